@@ -2,11 +2,15 @@
 Health Check API - 健康检查接口
 """
 
+from typing import Optional
+
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from datetime import datetime
 
+from .. import __version__
 from ..config import Settings, get_settings
+from ..dependencies import get_settings_dep
 
 router = APIRouter(tags=["Health"])
 
@@ -28,15 +32,33 @@ class ConfigResponse(BaseModel):
     debug: bool
 
 
+# 公开配置响应（配置在进程内不变，首次请求时构建一次）
+_STATIC_CONFIG_RESPONSE: Optional[ConfigResponse] = None
+
+
+def _get_static_config_response() -> ConfigResponse:
+    """获取公开配置响应（纯内存操作，在事件循环中直接调用）"""
+    global _STATIC_CONFIG_RESPONSE
+    if _STATIC_CONFIG_RESPONSE is not None:
+        return _STATIC_CONFIG_RESPONSE
+    settings = get_settings()
+    _STATIC_CONFIG_RESPONSE = ConfigResponse(
+        manus_api_base_url=settings.manus_api_base_url,
+        poll_interval=settings.poll_interval,
+        poll_timeout=settings.poll_timeout,
+        output_dir=str(settings.output_dir),
+        debug=settings.debug,
+    )
+    return _STATIC_CONFIG_RESPONSE
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check(settings: Settings = Depends(get_settings)):
+async def health_check(settings: Settings = Depends(get_settings_dep)):
     """
     健康检查接口
 
     返回服务状态和基本信息
     """
-    from .. import __version__
-
     return HealthResponse(
         status="healthy",
         version=__version__,
@@ -46,19 +68,13 @@ async def health_check(settings: Settings = Depends(get_settings)):
 
 
 @router.get("/config", response_model=ConfigResponse)
-async def get_config(settings: Settings = Depends(get_settings)):
+async def get_config():
     """
     获取公开配置信息
 
     不返回敏感信息（如 API Key）
     """
-    return ConfigResponse(
-        manus_api_base_url=settings.manus_api_base_url,
-        poll_interval=settings.poll_interval,
-        poll_timeout=settings.poll_timeout,
-        output_dir=str(settings.output_dir),
-        debug=settings.debug,
-    )
+    return _get_static_config_response()
 
 
 @router.get("/test-error")
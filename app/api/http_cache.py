@@ -0,0 +1,34 @@
+"""
+HTTP Cache - 条件请求（ETag / 304）相关的公共函数
+"""
+
+from typing import Dict, Optional
+
+
+# 已完成的任务文件不可变，允许浏览器长期缓存
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# 任务状态接口每次都需要重新验证，未变化时返回 304
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断 If-None-Match 是否命中 ETag（忽略弱校验前缀）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def task_etag(task) -> str:
+    """根据任务更新时间生成弱 ETag"""
+    return f'W/"{task.updated_at.isoformat()}"'
+
+
+def revalidate_headers(etag: str) -> Dict[str, str]:
+    """任务状态接口的缓存响应头"""
+    return {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
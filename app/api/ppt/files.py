@@ -3,13 +3,16 @@ PPT Service Files API - PPT 服务文件管理路由
 """
 
 import logging
-from typing import Optional
+from typing import Optional, AsyncIterator
 
+import anyio
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 
 from ...schemas import (
     APIResponse,
+    FileUploadRequest,
     FileUploadResponse,
+    FileUploadUrlResponse,
     FileListResponse,
     FileResponse,
 )
@@ -24,6 +27,38 @@ router = APIRouter(prefix="/ppt/files", tags=["ppt"])
 # 文件大小限制 10MB
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# 上传转发的分块大小 64KB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# 上传文件读取的线程并发上限
+# SpooledTemporaryFile 超过 1MB 会落盘，读取是阻塞 IO，放到独立的线程配额中执行，
+# 避免占满默认线程池影响其他同步依赖
+_upload_limiter = anyio.CapacityLimiter(16)
+
+
+def _file_too_large(file_size: int) -> HTTPException:
+    """文件超过大小限制时的异常"""
+    return HTTPException(
+        status_code=400,
+        detail=f"File too large: {file_size} bytes, max {MAX_FILE_SIZE} bytes (10MB)",
+    )
+
+
+async def _iter_upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    """
+    按固定大小分块读取上传文件
+
+    边读边累计大小，超过限制时立即中止，不读取剩余内容
+    """
+    size = 0
+    while chunk := await anyio.to_thread.run_sync(
+        file.file.read, UPLOAD_CHUNK_SIZE, limiter=_upload_limiter
+    ):
+        size += len(chunk)
+        if size > MAX_FILE_SIZE:
+            raise _file_too_large(size)
+        yield chunk
+
 
 @router.post(
     "/upload",
@@ -42,15 +77,11 @@ async def upload_file(
     - 文件大小限制 10MB
     - 返回 file_id 用于创建 PPT 任务时附加
     """
-    # 检查文件大小
-    content = await file.read()
-    file_size = len(content)
+    # 检查文件大小（multipart 解析时已记录，无需读取内容）
+    file_size = file.size or 0
 
     if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large: {file_size} bytes, max {MAX_FILE_SIZE} bytes (10MB)",
-        )
+        raise _file_too_large(file_size)
 
     if file_size == 0:
         raise HTTPException(
@@ -61,9 +92,10 @@ async def upload_file(
     logger.info(f"Uploading file for PPT service: {file.filename} ({file_size} bytes)")
 
     try:
-        result = await file_manager.upload_file_content(
-            content=content,
+        result = await file_manager.upload_file_stream(
+            chunks=_iter_upload_chunks(file),
             filename=file.filename,
+            size=file_size,
         )
 
         return APIResponse(
@@ -77,6 +109,8 @@ async def upload_file(
             message="文件上传成功",
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"File upload failed: {e}")
         raise HTTPException(
@@ -85,6 +119,45 @@ async def upload_file(
         )
 
 
+@router.post(
+    "/upload-url",
+    response_model=APIResponse[FileUploadUrlResponse],
+    summary="获取文件直传地址（PPT 服务）",
+    description="返回预签名上传地址，客户端直接 PUT 文件到该地址，文件数据不经过本服务",
+)
+async def create_upload_url(
+    request: FileUploadRequest,
+    file_manager: AsyncFileManager = Depends(get_file_manager),
+):
+    """
+    获取文件直传地址（PPT 服务）
+
+    - 客户端使用返回的 upload_url 直接 PUT 文件内容
+    - 上传完成后使用 file_id 创建 PPT 任务
+    - /upload 接口保留为服务端代理上传
+    """
+    logger.info(f"Creating upload URL for PPT service: {request.filename}")
+
+    try:
+        result = await file_manager.create_upload_url(request.filename)
+
+        return APIResponse(
+            success=True,
+            data=FileUploadUrlResponse(
+                file_id=result["file_id"],
+                filename=result["filename"],
+                upload_url=result["upload_url"],
+            ),
+        )
+
+    except Exception as e:
+        logger.error(f"Create upload URL failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Create upload URL failed: {str(e)}",
+        )
+
+
 @router.get(
     "",
     response_model=APIResponse[FileListResponse],
@@ -94,7 +167,11 @@ async def upload_file(
 async def list_files(
     file_manager: AsyncFileManager = Depends(get_file_manager),
 ):
-    """获取已上传文件列表（PPT 服务）"""
+    """
+    获取已上传文件列表（PPT 服务）
+
+    所有条目在返回前完成校验，上游数据异常时返回 500，而不是输出不完整的 JSON
+    """
     try:
         result = await file_manager.list_files()
 
@@ -4,12 +4,19 @@ PPT Service Router - PPT 生成服务路由
 整合轮询模式和 Webhook 模式的任务管理
 """
 
+import asyncio
+import base64
+import json
 import logging
-from typing import Optional
+import os
+import time
+from typing import Optional, Tuple, Dict, List
 from pathlib import Path
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+import aiofiles.os
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
 
 from ...schemas import (
@@ -20,15 +27,28 @@ from ...schemas import (
     TaskListItem,
     TaskProgressResponse,
     TaskDetailResponse,
+    TaskFile,
     LocalTaskStatus,
     TaskStatus,
     APIResponse,
 )
-from ...services import TaskTrackerService, PPTGeneratorService
-from ...dependencies import get_task_tracker, get_ppt_generator, get_manus_client
-from ...manus_client import AsyncManusClient, AsyncTaskManager
+from ...services import TaskTrackerService, GenerationQueue
+from ...dependencies import (
+    get_settings_dep,
+    get_task_tracker_dep,
+    get_ppt_generator,
+    get_generation_queue,
+    get_manus_client,
+)
+from ...manus_client import AsyncManusClient, AsyncTaskManager, iter_output_files
 from ...websocket import manager
-from ...config import get_settings
+from ...config import Settings
+from ..http_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    etag_matches,
+    revalidate_headers,
+    task_etag,
+)
 from ...exceptions import ManusAPIException
 
 logger = logging.getLogger(__name__)
@@ -36,6 +56,52 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ppt/tasks", tags=["ppt"])
 
 
+def _encode_cursor(task) -> str:
+    """将任务的 (created_at, id) 编码为分页游标"""
+    raw = json.dumps([task.created_at, task.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+# 状态值 -> LocalTaskStatus，字典查找，不走枚举构造的异常路径
+_STATUS_MAP = LocalTaskStatus._value2member_map_
+
+
+# 任务数量缓存：status -> (统计时间, 数量)，允许秒级的统计延迟
+_COUNT_CACHE_TTL = 5.0
+_count_cache: Dict[Optional[str], Tuple[float, int]] = {}
+
+
+def _get_cached_count(status: Optional[str]) -> Optional[int]:
+    """获取缓存的任务数量，缓存不存在或已过期时返回 None"""
+    cached = _count_cache.get(status)
+    if cached and time.monotonic() - cached[0] < _COUNT_CACHE_TTL:
+        return cached[1]
+    return None
+
+
+def _set_cached_count(status: Optional[str], total: int) -> None:
+    """缓存任务数量"""
+    # 非法状态不缓存，避免任意参数撑大缓存
+    if status is None or status in _STATUS_MAP:
+        _count_cache[status] = (time.monotonic(), total)
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    """解析分页游标为 (created_at, id)"""
+    try:
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(task_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+
+def _build_attachments(request: CreateTaskRequest) -> Optional[List[Dict[str, str]]]:
+    """将请求中的附件转换为任务记录使用的字典列表"""
+    if not request.attachments:
+        return None
+    return [a.model_dump() for a in request.attachments]
+
+
 # ========== 轮询模式 API ==========
 
 @router.post(
@@ -43,42 +109,42 @@ router = APIRouter(prefix="/ppt/tasks", tags=["ppt"])
     response_model=APIResponse[CreateTaskResponse],
     summary="创建 PPT 生成任务（轮询模式）",
     description="创建新的 PPT 生成任务，立即返回任务 ID，后台异步执行生成流程",
+    # 创建任务前先确认生成服务可用（如 API Key 已配置），避免任务入队后无法执行
+    dependencies=[Depends(get_ppt_generator)],
 )
 async def create_task(
     request: CreateTaskRequest,
-    background_tasks: BackgroundTasks,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
-    generator: PPTGeneratorService = Depends(get_ppt_generator),
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
+    queue: GenerationQueue = Depends(get_generation_queue),
 ):
     """
     创建 PPT 生成任务（轮询模式）
 
     - 接收 prompt 和可选的 attachments
     - 立即返回本地 task_id
-    - 后台异步执行任务
+    - 任务进入生成队列，由后台 worker 执行
     """
+    # 队列已满时拒绝新任务，由客户端稍后重试
+    if queue.is_full:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many PPT tasks in queue, please retry later",
+        )
+
     logger.info(f"Creating PPT task with prompt: {request.prompt[:50]}...")
 
     # 创建本地任务记录
-    attachments = None
-    if request.attachments:
-        attachments = [
-            {"filename": a.filename, "file_id": a.file_id}
-            for a in request.attachments
-        ]
+    attachments = _build_attachments(request)
 
     local_task = await tracker.create(
         prompt=request.prompt,
         attachments=attachments,
     )
 
-    # 添加后台任务
-    background_tasks.add_task(
-        generator.generate_ppt,
-        local_task.id,
-    )
+    # 加入生成队列
+    queue.enqueue(local_task.id)
 
-    logger.info(f"PPT task created: {local_task.id}, background task started")
+    logger.info(f"PPT task created: {local_task.id}, queued for generation")
 
     return APIResponse(
         success=True,
@@ -106,7 +172,9 @@ class CreateTaskV2Request(CreateTaskRequest):
 )
 async def create_task_webhook(
     request: CreateTaskV2Request,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
+    client: AsyncManusClient = Depends(get_manus_client),
+    settings: Settings = Depends(get_settings_dep),
 ):
     """
     创建 PPT 生成任务（Webhook 模式）
@@ -118,8 +186,6 @@ async def create_task_webhook(
     4. 等待 Manus Webhook 回调
     5. 通过 WebSocket 推送状态给前端
     """
-    settings = get_settings()
-    
     # 检查 Webhook 是否启用
     if not settings.webhook_enabled:
         raise HTTPException(
@@ -130,12 +196,7 @@ async def create_task_webhook(
     logger.info(f"[Webhook] Creating PPT task with prompt: {request.prompt[:50]}...")
     
     # 创建本地任务记录
-    attachments = None
-    if request.attachments:
-        attachments = [
-            {"filename": a.filename, "file_id": a.file_id}
-            for a in request.attachments
-        ]
+    attachments = _build_attachments(request)
     
     local_task = await tracker.create(
         prompt=request.prompt,
@@ -145,14 +206,8 @@ async def create_task_webhook(
     # 更新状态为处理中
     await tracker.update(local_task.id, status=LocalTaskStatus.PROCESSING.value)
     
-    # 如果提供了 client_id，自动订阅任务更新
-    if request.client_id and manager.is_connected(request.client_id):
-        # 先订阅本地任务 ID（前端用这个查询）
-        await manager.subscribe_task(request.client_id, local_task.id)
-    
     try:
-        # 调用 Manus API 创建任务
-        client = AsyncManusClient()
+        # 调用 Manus API 创建任务（复用全局客户端的连接池）
         task_manager = AsyncTaskManager(client)
         
         manus_result = await task_manager.create_task(
@@ -168,14 +223,15 @@ async def create_task_webhook(
             manus_task_id=manus_task_id,
         )
         
-        # 订阅 Manus 任务 ID 的更新（Webhook 用这个推送）
-        if request.client_id and manager.is_connected(request.client_id):
-            await manager.subscribe_task(request.client_id, manus_task_id)
+        # 如果提供了 client_id，自动订阅任务更新：
+        # 本地任务 ID（前端用这个查询）和 Manus 任务 ID（Webhook 用这个推送）
+        if request.client_id:
+            await manager.subscribe_tasks(
+                request.client_id, [local_task.id, manus_task_id]
+            )
         
         logger.info(f"[Webhook] PPT task created: local_id={local_task.id}, manus_id={manus_task_id}")
         
-        await client.close()
-        
         return APIResponse(
             success=True,
             data=CreateTaskResponse(
@@ -197,20 +253,23 @@ async def create_task_webhook(
         else:
             logger.error(f"[Webhook] Failed to create Manus PPT task: {e}")
         
-        # 更新本地任务状态为失败
-        await tracker.update(
-            local_task.id,
-            status=LocalTaskStatus.FAILED.value,
-            error=str(e),
-        )
-        
-        # 通过 WebSocket 通知失败
+        # 更新本地任务状态为失败，同时通过 WebSocket 通知失败
+        coros = [
+            tracker.update(
+                local_task.id,
+                status=LocalTaskStatus.FAILED.value,
+                error=str(e),
+            )
+        ]
         if request.client_id:
-            await manager.send_to_client(request.client_id, {
+            coros.append(manager.send_to_client(request.client_id, {
                 "type": "task_failed",
                 "task_id": local_task.id,
                 "error": str(e),
-            })
+            }))
+        
+        # 收尾失败不应掩盖原始异常
+        await asyncio.gather(*coros, return_exceptions=True)
         
         raise HTTPException(
             status_code=500,
@@ -219,10 +278,8 @@ async def create_task_webhook(
 
 
 @router.get("/webhook-status")
-async def get_webhook_status():
+async def get_webhook_status(settings: Settings = Depends(get_settings_dep)):
     """获取 Webhook 模式状态"""
-    settings = get_settings()
-    
     webhook_url = ""
     if settings.webhook_base_url:
         webhook_url = settings.webhook_callback_url()
@@ -243,8 +300,9 @@ async def get_webhook_status():
 @router.get(
     "",
     response_model=APIResponse[TaskListResponse],
+    response_model_exclude_none=True,
     summary="获取 PPT 任务列表",
-    description="获取所有 PPT 任务列表，支持分页和状态过滤",
+    description="获取所有 PPT 任务列表，支持游标分页和状态过滤",
 )
 async def list_tasks(
     status: Optional[str] = Query(
@@ -252,17 +310,31 @@ async def list_tasks(
         description="状态过滤: pending, uploading, processing, downloading, completed, failed",
     ),
     limit: int = Query(20, ge=1, le=100, description="返回数量限制"),
-    offset: int = Query(0, ge=0, description="偏移量"),
-    tracker: TaskTrackerService = Depends(get_task_tracker),
+    cursor: Optional[str] = Query(None, description="分页游标，传入上一页返回的 next_cursor"),
+    include_total: bool = Query(False, description="是否返回总数量（需要额外统计）"),
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
     """获取 PPT 任务列表"""
-    tasks = await tracker.list(status=status, limit=limit, offset=offset)
-    total = await tracker.count(status=status)
+    after = _decode_cursor(cursor) if cursor else None
+
+    total = _get_cached_count(status) if include_total else None
+    # 总数缓存未命中时，在同一次存储读取中统计总数
+    count_total = include_total and total is None
+
+    # 多取一条用于判断是否还有下一页
+    tasks, counted = await tracker.list_summary(
+        status=status, limit=limit + 1, cursor=after, with_total=count_total
+    )
+    if count_total:
+        total = counted
+        _set_cached_count(status, total)
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
 
     task_items = [
         TaskListItem(
             id=t.id,
-            status=LocalTaskStatus(t.status),
+            status=_STATUS_MAP[t.status],
             prompt=t.prompt,
             credit_usage=t.credit_usage,
             metadata={"task_title": t.title, "task_url": t.task_url} if t.title else None,
@@ -276,7 +348,8 @@ async def list_tasks(
         data=TaskListResponse(
             tasks=task_items,
             total=total,
-            has_more=(offset + limit) < total,
+            has_more=has_more,
+            next_cursor=_encode_cursor(tasks[-1]) if has_more else None,
         ),
     )
 
@@ -284,24 +357,36 @@ async def list_tasks(
 @router.get(
     "/{task_id}",
     response_model=APIResponse[TaskProgressResponse],
+    response_model_exclude_none=True,
     summary="获取 PPT 任务详情",
     description="获取指定 PPT 任务的详细信息和进度",
 )
 async def get_task(
     task_id: str,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
+    request: Request,
+    response: Response,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
-    """获取 PPT 任务详情"""
+    """
+    获取 PPT 任务详情
+
+    带基于更新时间的 ETag，轮询时任务未变化返回 304
+    """
     task = await tracker.get(task_id)
 
     if not task:
         raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
 
+    headers = revalidate_headers(task_etag(task))
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
     return APIResponse(
         success=True,
         data=TaskProgressResponse(
             task_id=task.id,
-            status=LocalTaskStatus(task.status),
+            status=_STATUS_MAP[task.status],
             title=task.title,
             task_url=task.task_url,
             message_count=0,
@@ -310,14 +395,38 @@ async def get_task(
     )
 
 
+@router.get(
+    "/{task_id}/queue",
+    response_model=APIResponse,
+    summary="获取 PPT 任务排队状态",
+    description="调试用：返回任务在生成队列中的状态与队列深度",
+)
+async def get_task_queue_state(
+    task_id: str,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
+    queue: GenerationQueue = Depends(get_generation_queue),
+):
+    """获取 PPT 任务排队状态"""
+    if not await tracker.get(task_id):
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+
+    return APIResponse(
+        success=True,
+        data={**queue.get_task_state(task_id), **queue.get_stats()},
+    )
+
+
 @router.get(
     "/{task_id}/detail",
+    response_model=None,
     summary="获取 PPT 任务完整详情",
     description="获取 PPT 任务的所有信息，包括下载链接",
 )
 async def get_task_detail(
     task_id: str,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
+    request: Request,
+    response: Response,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
     """获取 PPT 任务完整详情"""
     task = await tracker.get(task_id)
@@ -325,6 +434,11 @@ async def get_task_detail(
     if not task:
         raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
 
+    headers = revalidate_headers(task_etag(task))
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
     return APIResponse(
         success=True,
         data={
@@ -374,6 +488,114 @@ async def get_task_by_manus_id(
         )
 
 
+def _manus_ts(timestamp, fallback: Optional[datetime]) -> Optional[datetime]:
+    """Manus 返回的 Unix 时间戳优先，否则回退到本地任务时间"""
+    return datetime.fromtimestamp(timestamp) if timestamp else fallback
+
+
+def _extract_task_files(output_messages) -> List[TaskFile]:
+    """从 Manus 输出消息中提取所有 output_file"""
+    return [
+        TaskFile(fileUrl=url, fileName=name, mimeType=mime)
+        for url, name, mime in iter_output_files(output_messages)
+        if name
+    ]
+
+
+# 完整详情缓存：task_id -> (缓存时间, 本地状态快照, 详情)
+# 已完成任务的 Manus 数据不再变化，一直有效；进行中的任务只缓存很短时间
+_DETAIL_CACHE_TTL = 2.0
+_DETAIL_CACHE_MAX = 1024
+_detail_cache: Dict[str, Tuple[float, str, TaskDetailResponse]] = {}
+
+
+def _get_cached_detail(local_task) -> Optional[TaskDetailResponse]:
+    """获取缓存的任务详情，本地状态变化或已过期时返回 None"""
+    cached = _detail_cache.get(local_task.id)
+    if not cached or cached[1] != local_task.status:
+        return None
+    if local_task.status == LocalTaskStatus.COMPLETED.value or time.monotonic() - cached[0] < _DETAIL_CACHE_TTL:
+        return cached[2]
+    return None
+
+
+def _set_cached_detail(local_task, detail: TaskDetailResponse) -> None:
+    """缓存任务详情，超过上限时淘汰最早写入的条目"""
+    _detail_cache.pop(local_task.id, None)
+    if len(_detail_cache) >= _DETAIL_CACHE_MAX:
+        _detail_cache.pop(next(iter(_detail_cache)))
+    _detail_cache[local_task.id] = (time.monotonic(), local_task.status, detail)
+
+
+def _local_task_detail(local_task):
+    """仅根据本地记录构建任务详情"""
+    return TaskDetailResponse(
+        id=local_task.id,
+        status=TaskStatus(local_task.status) if local_task.status in ["pending", "running", "completed", "failed"] else TaskStatus.PENDING,
+        prompt=local_task.prompt,
+        title=local_task.title,
+        task_url=local_task.task_url,
+        credit_usage=local_task.credit_usage,
+        created_at=local_task.created_at,
+        updated_at=local_task.updated_at,
+        local_file_path=local_task.local_file_path,
+    )
+
+
+async def _fetch_full_detail(local_task, client: AsyncManusClient) -> TaskDetailResponse:
+    """从 Manus API 获取任务并组装完整详情（成功后写入详情缓存）"""
+    task_manager = AsyncTaskManager(client)
+    manus_task = await task_manager.get_task(local_task.manus_task_id, convert=True)
+
+    # 提取所有文件
+    output_messages = manus_task.get("output", [])
+
+    logger.info(f"提取 PPT 任务文件: task_id={local_task.manus_task_id}, output_messages_count={len(output_messages)}")
+
+    files = _extract_task_files(output_messages)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for f in files:
+            logger.debug(f"找到文件: {f.file_name} ({f.mime_type})")
+    logger.info(f"提取到 {len(files)} 个文件")
+
+    detail = TaskDetailResponse(
+        id=local_task.id,
+        status=TaskStatus(manus_task.get("status", local_task.status)),
+        prompt=local_task.prompt,
+        title=manus_task.get("metadata", {}).get("task_title") or local_task.title,
+        task_url=manus_task.get("metadata", {}).get("task_url") or local_task.task_url,
+        credit_usage=manus_task.get("credit_usage") or local_task.credit_usage,
+        created_at=_manus_ts(manus_task.get("created_at"), local_task.created_at),
+        updated_at=_manus_ts(manus_task.get("updated_at"), local_task.updated_at),
+        files=files,
+        output=output_messages,
+        local_file_path=local_task.local_file_path,
+    )
+    _set_cached_detail(local_task, detail)
+    return detail
+
+
+# 进行中的 Manus 详情请求：task_id -> 请求任务
+_inflight_details: Dict[str, "asyncio.Task[TaskDetailResponse]"] = {}
+
+
+async def _fetch_full_detail_shared(local_task, client: AsyncManusClient) -> TaskDetailResponse:
+    """
+    获取完整详情（single-flight）
+
+    同一任务的并发请求等待同一个 Manus 调用；使用 shield，
+    单个请求断开不会取消其他请求正在等待的调用
+    """
+    task_id = local_task.id
+    inflight = _inflight_details.get(task_id)
+    if inflight is None:
+        inflight = asyncio.create_task(_fetch_full_detail(local_task, client))
+        _inflight_details[task_id] = inflight
+        inflight.add_done_callback(lambda _: _inflight_details.pop(task_id, None))
+    return await asyncio.shield(inflight)
+
+
 @router.get(
     "/{task_id}/full",
     response_model=APIResponse,
@@ -382,99 +604,54 @@ async def get_task_by_manus_id(
 )
 async def get_task_full_detail(
     task_id: str,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
+    request: Request,
+    response: Response,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
     client: AsyncManusClient = Depends(get_manus_client),
 ):
-    """获取 PPT 任务完整详情，包括从 Manus API 获取的所有文件"""
-    from ...schemas import TaskDetailResponse, TaskFile
-    
+    """
+    获取 PPT 任务完整详情，包括从 Manus API 获取的所有文件
+
+    已完成任务带 ETag，未变化时返回 304；进行中任务的 Manus 数据可能在本地记录
+    未更新时变化，不使用 ETag
+    """
     # 获取本地任务
     local_task = await tracker.get(task_id)
     if not local_task:
         raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
 
+    # ETag 只附加在完整数据上，Manus 调用失败时的降级数据不能被客户端缓存
+    cache_headers: Dict[str, str] = {}
+    if local_task.status == LocalTaskStatus.COMPLETED.value:
+        cache_headers = revalidate_headers(task_etag(local_task))
+        if etag_matches(request.headers.get("if-none-match"), cache_headers["ETag"]):
+            return Response(status_code=304, headers=cache_headers)
+
     # 如果没有 Manus 任务 ID，只返回本地信息
     if not local_task.manus_task_id:
+        response.headers.update(cache_headers)
         return APIResponse(
             success=True,
-            data=TaskDetailResponse(
-                id=local_task.id,
-                status=TaskStatus(local_task.status) if local_task.status in ["pending", "running", "completed", "failed"] else TaskStatus.PENDING,
-                prompt=local_task.prompt,
-                title=local_task.title,
-                task_url=local_task.task_url,
-                credit_usage=local_task.credit_usage,
-                created_at=datetime.fromisoformat(local_task.created_at) if local_task.created_at else None,
-                updated_at=datetime.fromisoformat(local_task.updated_at) if local_task.updated_at else None,
-                local_file_path=local_task.local_file_path,
-            ),
+            data=_local_task_detail(local_task),
         )
 
-    # 从 Manus API 获取完整任务信息
+    cached = _get_cached_detail(local_task)
+    if cached is not None:
+        response.headers.update(cache_headers)
+        return APIResponse(success=True, data=cached)
+
+    # 从 Manus API 获取完整任务信息（同一任务的并发请求共享一次调用）
     try:
-        task_manager = AsyncTaskManager(client)
-        manus_task = await task_manager.get_task(local_task.manus_task_id, convert=True)
-        
-        # 提取所有文件
-        files = []
-        output_messages = manus_task.get("output", [])
-        
-        logger.info(f"提取 PPT 任务文件: task_id={local_task.manus_task_id}, output_messages_count={len(output_messages)}")
-        
-        for message in output_messages:
-            message_type = message.get("type")
-            if message_type == "message":
-                content_items = message.get("content", [])
-                for content in content_items:
-                    content_type = content.get("type")
-                    if content_type == "output_file":
-                        file_url = content.get("fileUrl") or content.get("file_url")
-                        file_name = content.get("fileName") or content.get("file_name")
-                        mime_type = content.get("mimeType") or content.get("mime_type")
-                        
-                        if file_url and file_name:
-                            files.append(TaskFile(
-                                fileUrl=file_url,
-                                fileName=file_name,
-                                mimeType=mime_type,
-                            ))
-                            logger.debug(f"找到文件: {file_name} ({mime_type})")
-        
-        logger.info(f"提取到 {len(files)} 个文件")
-        
-        # 构建响应
-        return APIResponse(
-            success=True,
-            data=TaskDetailResponse(
-                id=local_task.id,
-                status=TaskStatus(manus_task.get("status", local_task.status)),
-                prompt=local_task.prompt,
-                title=manus_task.get("metadata", {}).get("task_title") or local_task.title,
-                task_url=manus_task.get("metadata", {}).get("task_url") or local_task.task_url,
-                credit_usage=manus_task.get("credit_usage") or local_task.credit_usage,
-                created_at=datetime.fromtimestamp(manus_task.get("created_at", 0)) if manus_task.get("created_at") else (datetime.fromisoformat(local_task.created_at) if local_task.created_at else None),
-                updated_at=datetime.fromtimestamp(manus_task.get("updated_at", 0)) if manus_task.get("updated_at") else (datetime.fromisoformat(local_task.updated_at) if local_task.updated_at else None),
-                files=files,
-                output=output_messages,
-                local_file_path=local_task.local_file_path,
-            ),
-        )
+        detail = await _fetch_full_detail_shared(local_task, client)
+        response.headers.update(cache_headers)
+        return APIResponse(success=True, data=detail)
     except Exception as e:
         logger.error(f"Failed to get PPT task detail from Manus API: {e}")
-        # 如果 Manus API 调用失败，返回本地信息
+        # 如果 Manus API 调用失败，返回本地信息（不带 ETag，禁止缓存，下次请求重新获取）
+        response.headers["Cache-Control"] = "no-store"
         return APIResponse(
             success=True,
-            data=TaskDetailResponse(
-                id=local_task.id,
-                status=TaskStatus(local_task.status) if local_task.status in ["pending", "running", "completed", "failed"] else TaskStatus.PENDING,
-                prompt=local_task.prompt,
-                title=local_task.title,
-                task_url=local_task.task_url,
-                credit_usage=local_task.credit_usage,
-                created_at=datetime.fromisoformat(local_task.created_at) if local_task.created_at else None,
-                updated_at=datetime.fromisoformat(local_task.updated_at) if local_task.updated_at else None,
-                local_file_path=local_task.local_file_path,
-            ),
+            data=_local_task_detail(local_task),
         )
 
 
@@ -485,9 +662,14 @@ async def get_task_full_detail(
 )
 async def download_task_file(
     task_id: str,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
+    request: Request,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
-    """下载 PPT 文件"""
+    """
+    下载 PPT 文件
+
+    已完成的文件内容不再变化，带内容哈希 ETag，客户端缓存命中时返回 304
+    """
     task = await tracker.get(task_id)
 
     if not task:
@@ -505,25 +687,47 @@ async def download_task_file(
             detail="PPT file not found, please check task status",
         )
 
+    etag = f'"{task.pptx_etag}"' if task.pptx_etag else None
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+        )
+
     file_path = Path(task.local_file_path)
-    if not file_path.exists():
+    # stat 是阻塞调用，放到线程中执行；结果直接交给 FileResponse，避免重复 stat
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, file_path)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail=f"File not found: {task.local_file_path}",
         )
 
-    filename = task.pptx_filename or f"ppt_{task_id[:8]}.pptx"
-    # 确保文件名有 .pptx 后缀
-    if not filename.lower().endswith('.pptx'):
-        filename = f"{filename}.pptx"
-
     return FileResponse(
         path=file_path,
-        filename=filename,
+        # 本地文件以最终下载文件名保存（含 .pptx 后缀），直接使用
+        filename=file_path.name,
+        content_disposition_type="attachment",
         media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        # 已有 stat 结果，FileResponse 不再重复 stat；Range 请求（断点续传）由 FileResponse 处理
+        stat_result=stat_result,
+        headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL} if etag else None,
     )
 
 
+async def _remove_task_file(path: Path) -> None:
+    """删除任务的本地 PPT 文件（任务记录删除后在后台执行），文件不存在时忽略"""
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        return
+    except OSError as e:
+        logger.warning(f"Failed to delete PPT file {path}: {e}")
+        return
+    logger.info(f"Deleted PPT file: {path}")
+
+
 @router.delete(
     "/{task_id}",
     response_model=APIResponse,
@@ -532,7 +736,8 @@ async def download_task_file(
 )
 async def delete_task(
     task_id: str,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
+    background_tasks: BackgroundTasks,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
     """删除 PPT 任务"""
     task = await tracker.get(task_id)
@@ -540,15 +745,13 @@ async def delete_task(
     if not task:
         raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
 
-    # 删除本地文件
-    if task.local_file_path:
-        file_path = Path(task.local_file_path)
-        if file_path.exists():
-            file_path.unlink()
-            logger.info(f"Deleted PPT file: {file_path}")
-
-    # 删除任务记录
+    # 先删除任务记录，再删除文件：中途失败只会留下孤立文件，不会留下指向已删除文件的记录
     await tracker.delete(task_id)
+    _detail_cache.pop(task_id, None)
+
+    # 本地文件在响应返回后删除，不阻塞请求
+    if task.local_file_path:
+        background_tasks.add_task(_remove_task_file, Path(task.local_file_path))
 
     return APIResponse(
         success=True,
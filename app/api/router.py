@@ -17,7 +17,7 @@ from .video import video_router
 from .crawler import crawler_router
 from .test import router as test_router
 
-# 创建主路由
+# 创建主路由（响应类使用应用级默认的 ORJSONResponse）
 api_router = APIRouter(prefix="/api")
 
 # 注册全局路由
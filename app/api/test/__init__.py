@@ -3,6 +3,6 @@
 用于开发和测试，不调用真实的 Manus API
 """
 
-from .router import router
+from .router import router, cancel_replay_tasks
 
-__all__ = ["router"]
+__all__ = ["router", "cancel_replay_tasks"]
@@ -4,18 +4,22 @@
 """
 
 import asyncio
-import json
 import logging
+import os
+import stat
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 
+import orjson
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, Field
 
 from ...config import get_settings
-from ...dependencies import get_task_tracker
-from ...services import TaskTrackerService
+from ...dependencies import get_settings_dep, get_task_tracker_dep
+from ...services import TaskTrackerService, LocalTask
 from ...websocket import manager
 
 logger = logging.getLogger(__name__)
@@ -29,6 +33,7 @@ class ReplayRequest(BaseModel):
     client_id: Optional[str] = Field(None, description="WebSocket 客户端 ID（可选）")
     speed: float = Field(1.0, ge=0.1, le=10.0, description="回放速度倍数（1.0 = 正常速度，2.0 = 2倍速）")
     local_task_id: Optional[str] = Field(None, description="本地任务 ID（如果已存在）")
+    min_delay: float = Field(0.0, ge=0.0, le=5.0, description="相邻消息的最小间隔秒数（0 = 按实际间隔回放）")
 
 
 class ReplayResponse(BaseModel):
@@ -39,71 +44,176 @@ class ReplayResponse(BaseModel):
     script_task_id: str
     video_task_id: str
     total_events: int
-    estimated_duration: float
+    estimated_duration: float = Field(
+        ...,
+        description="预计回放时长（秒），按事件总时长 / 速度估算。"
+                    "回放时单次间隔最长 5 秒；不再强制 0.3 秒最小间隔，可通过 min_delay 设置",
+    )
 
 
-def load_tasks_json(settings=None) -> Dict[str, Any]:
-    """加载 tasks.json 文件"""
-    if settings is None:
-        settings = get_settings()
-    
-    # 尝试多个可能的路径（按优先级）
+# 回放时单次等待的上限（秒），避免历史数据中的长间隔让回放停顿太久
+_MAX_REPLAY_DELAY = 5.0
+# 小于该值的间隔不等待，直接发送（秒）
+_MIN_REPLAY_SLEEP = 0.05
+
+# 项目根目录（相对路径配置从这里解析）
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+@dataclass
+class _TasksSnapshot:
+    """tasks.json 的一次解析结果"""
+    version: Tuple[int, int]                   # (mtime_ns, size)
+    data: Dict[str, Any]                       # 全部任务
+    replayable: List[Dict[str, Any]]           # 可回放任务摘要（与 data 同时构建）
+    # id(事件字典) -> 事件时间（秒），加载时计算一次；原始事件字典保持不变
+    epochs: Dict[int, float] = field(default_factory=dict)
+    # 任务 ID -> parse_webhook_events 结果，首次回放时计算，随快照一起失效
+    parsed: Dict[str, Tuple[Optional[str], Optional[str], List[Dict[str, Any]]]] = field(
+        default_factory=dict
+    )
+
+
+# tasks.json 缓存：路径 -> 解析结果，文件未变化时不重复读取和解析
+_TASKS_CACHE: Dict[Path, _TasksSnapshot] = {}
+_TASKS_CACHE_LOCK = threading.Lock()
+
+
+def _build_replayable_summary(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """提取所有可回放的视频生成任务摘要"""
+    replayable_tasks = []
+    for task_id, task_data in data.items():
+        # 处理 metadata 可能为 None 的情况
+        metadata = task_data.get("metadata") or {}
+        
+        # 只处理有 webhook 事件的视频生成任务
+        if metadata.get("task_type") == "video_generation":
+            webhook_events = task_data.get("webhook_events", [])
+            if webhook_events:
+                replayable_tasks.append({
+                    "task_id": task_id,
+                    "topic": metadata.get("topic", "Unknown"),
+                    "duration": metadata.get("duration"),
+                    "style": metadata.get("style"),
+                    "target_audience": metadata.get("target_audience"),
+                    "status": task_data.get("status"),
+                    "event_count": len(webhook_events),
+                    "created_at": task_data.get("created_at"),
+                })
+    return replayable_tasks
+
+
+def _read_tasks_file(tasks_file: Path) -> _TasksSnapshot:
+    """
+    读取 tasks.json，mtime 和大小都未变化时直接返回缓存
+
+    返回的是共享的缓存数据，调用方不要修改
+    """
+    # 加锁读取，并发请求不会重复解析同一份文件
+    with _TASKS_CACHE_LOCK:
+        try:
+            st = os.stat(tasks_file)
+        except FileNotFoundError:
+            _TASKS_CACHE.pop(tasks_file, None)
+            raise
+
+        version = (st.st_mtime_ns, st.st_size)
+        cached = _TASKS_CACHE.get(tasks_file)
+        if cached and cached.version == version:
+            return cached
+
+        with open(tasks_file, "rb") as f:
+            data = orjson.loads(f.read())
+        snapshot = _TasksSnapshot(
+            version, data, _build_replayable_summary(data), _compute_event_epochs(data)
+        )
+        _TASKS_CACHE[tasks_file] = snapshot
+        logger.info(f"成功加载 tasks.json: {tasks_file}, 任务数: {len(data)}")
+        return snapshot
+
+
+def _candidate_tasks_paths(output_dir: Optional[str], tasks_file: Optional[str]) -> List[Path]:
+    """tasks.json 可能的路径（按优先级）"""
     possible_paths = []
     
-    # 1. 使用配置的 output_dir
-    if hasattr(settings, 'output_dir'):
-        output_dir = Path(settings.output_dir)
-        if output_dir.is_absolute():
-            possible_paths.append(output_dir / "tasks.json")
-        else:
-            # 相对路径，需要从项目根目录解析
-            project_root = Path(__file__).parent.parent.parent.parent
-            possible_paths.append(project_root / output_dir / "tasks.json")
+    # 1. 使用配置的 output_dir（相对路径从项目根目录解析）
+    if output_dir is not None:
+        possible_paths.append(_PROJECT_ROOT / output_dir / "tasks.json")
     
     # 2. 使用配置的 tasks_file
-    if hasattr(settings, 'tasks_file'):
-        tasks_file_path = Path(settings.tasks_file)
-        if tasks_file_path.is_absolute():
-            possible_paths.append(tasks_file_path)
-        else:
-            project_root = Path(__file__).parent.parent.parent.parent
-            possible_paths.append(project_root / tasks_file_path)
+    if tasks_file is not None:
+        possible_paths.append(_PROJECT_ROOT / tasks_file)
     
     # 3. 默认路径：项目根目录下的 output/tasks.json
-    project_root = Path(__file__).parent.parent.parent.parent
-    possible_paths.append(project_root / "output" / "tasks.json")
+    possible_paths.append(_PROJECT_ROOT / "output" / "tasks.json")
     
     # 4. 当前工作目录下的 output/tasks.json
     possible_paths.append(Path("output") / "tasks.json")
-    possible_paths.append(Path("./output/tasks.json"))
     
-    # 查找存在的文件
-    tasks_file = None
+    return possible_paths
+
+
+# 已找到的 tasks.json 路径：(output_dir, tasks_file) -> 路径
+_TASKS_PATHS: Dict[Tuple[Optional[str], Optional[str]], Path] = {}
+
+
+def _resolve_tasks_path(output_dir: Optional[str], tasks_file: Optional[str]) -> Path:
+    """
+    查找存在的 tasks.json 并缓存结果（配置不变时只查找一次）
+    
+    Raises:
+        FileNotFoundError: 所有候选路径都不存在
+    """
+    cached = _TASKS_PATHS.get((output_dir, tasks_file))
+    if cached is not None:
+        return cached
+    
+    possible_paths = _candidate_tasks_paths(output_dir, tasks_file)
     for path in possible_paths:
+        # 每个候选路径只 stat 一次，不存在或无法访问时直接尝试下一个
         try:
-            abs_path = path.resolve() if not path.is_absolute() else path
-            if abs_path.exists() and abs_path.is_file():
-                tasks_file = abs_path
-                logger.debug(f"找到 tasks.json: {tasks_file}")
-                break
-        except Exception as e:
+            st = os.stat(path)
+        except OSError as e:
             logger.debug(f"检查路径失败 {path}: {e}")
             continue
+        if stat.S_ISREG(st.st_mode):
+            abs_path = path.absolute()
+            logger.debug(f"找到 tasks.json: {abs_path}")
+            _TASKS_PATHS[(output_dir, tasks_file)] = abs_path
+            return abs_path
+    
+    raise FileNotFoundError(
+        f"tasks.json 文件不存在。尝试过的路径: {[str(p) for p in possible_paths]}"
+    )
+
+
+def _tasks_path_args(settings) -> Tuple[Optional[str], Optional[str]]:
+    """从配置中取出 _resolve_tasks_path 的参数"""
+    output_dir = getattr(settings, "output_dir", None)
+    tasks_file = getattr(settings, "tasks_file", None)
+    return (
+        str(output_dir) if output_dir is not None else None,
+        str(tasks_file) if tasks_file is not None else None,
+    )
+
+
+def _load_tasks_snapshot(settings=None) -> _TasksSnapshot:
+    """加载 tasks.json 文件（带缓存）"""
+    if settings is None:
+        settings = get_settings()
     
-    if tasks_file is None:
-        error_msg = f"tasks.json 文件不存在。尝试过的路径: {[str(p) for p in possible_paths]}"
-        logger.error(error_msg)
+    path_args = _tasks_path_args(settings)
+    try:
+        path = _resolve_tasks_path(*path_args)
+        return _read_tasks_file(path)
+    except FileNotFoundError as e:
+        # 文件被移走时重新查找
+        _TASKS_PATHS.pop(path_args, None)
+        logger.error(str(e))
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=error_msg
+            detail=str(e)
         )
-    
-    try:
-        with open(tasks_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            logger.info(f"成功加载 tasks.json: {tasks_file}, 任务数: {len(data)}")
-            return data
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"tasks.json JSON 解析失败: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -116,15 +226,92 @@ def load_tasks_json(settings=None) -> Dict[str, Any]:
             detail=f"加载 tasks.json 失败: {str(e)}"
         )
 
+try:
+    # 可选依赖：安装了 ciso8601 时使用 C 实现解析时间戳（原生支持 Z 后缀）
+    from ciso8601 import parse_datetime as _parse_ts
+except ImportError:
+    def _parse_ts(ts: str) -> datetime:
+        """解析 ISO 8601 时间戳（兼容 Z 后缀）"""
+        return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+def _peek_tasks_snapshot(settings) -> Optional[_TasksSnapshot]:
+    """
+    文件未变化时返回已缓存的快照，否则返回 None
+
+    不获取缓存锁，避免其他线程正在解析文件时阻塞事件循环；
+    路径尚未找到时不在这里查找（需要逐个 stat 候选路径），交给线程中的完整加载
+    """
+    path = _TASKS_PATHS.get(_tasks_path_args(settings))
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    
+    cached = _TASKS_CACHE.get(path)
+    if cached and cached.version == (st.st_mtime_ns, st.st_size):
+        return cached
+    return None
+
+
+async def _get_tasks_snapshot(settings) -> _TasksSnapshot:
+    """加载 tasks.json：缓存命中时直接返回，需要读取和解析文件时放到线程中执行"""
+    snapshot = _peek_tasks_snapshot(settings)
+    if snapshot is None:
+        snapshot = await asyncio.to_thread(_load_tasks_snapshot, settings)
+    return snapshot
+
+
+def load_tasks_json(settings=None) -> Dict[str, Any]:
+    """加载 tasks.json 文件"""
+    return _load_tasks_snapshot(settings).data
+
+
+def _compute_event_epochs(data: Dict[str, Any]) -> Dict[int, float]:
+    """
+    加载 tasks.json 时统一解析一次所有事件的时间戳
 
-def parse_webhook_events(task_data: Dict[str, Any]) -> tuple[str, str, List[Dict[str, Any]]]:
+    结果按 id(事件字典) 保存在快照中（快照持有事件字典，id 在快照有效期内不变），
+    排序和回放间隔直接用浮点数计算，不再构造 datetime；事件字典本身不做修改
+    """
+    epochs: Dict[int, float] = {}
+    for task_data in data.values():
+        for event in task_data.get("webhook_events") or ():
+            ts = event.get("timestamp")
+            if not isinstance(ts, str):
+                continue
+            try:
+                epochs[id(event)] = _parse_ts(ts).timestamp()
+            except ValueError:
+                # 无法解析的时间戳保持原样，回放该任务时再报错
+                logger.warning(f"无法解析事件时间戳: {ts}")
+    return epochs
+
+
+def _event_epoch(event: Dict[str, Any], epochs: Optional[Dict[int, float]] = None) -> float:
+    """事件时间（秒），优先使用加载时预先计算的值"""
+    epoch = epochs.get(id(event)) if epochs else None
+    if epoch is None:
+        epoch = _parse_ts(event["timestamp"]).timestamp()
+    return epoch
+
+
+def parse_webhook_events(
+    task_data: Dict[str, Any], epochs: Optional[Dict[int, float]] = None
+) -> tuple[str, str, List[Dict[str, Any]]]:
     """
     解析任务的 webhook_events，提取 script_task_id 和 video_task_id
     
+    Args:
+        task_data: 任务数据
+        epochs: 预先计算的事件时间（id(事件字典) -> 秒，可选）
+    
     Returns:
         (script_task_id, video_task_id, sorted_events)
     """
-    metadata = task_data.get("metadata", {})
+    metadata = task_data.get("metadata") or {}
     script_task_id = metadata.get("script_task_id")
     video_task_id = metadata.get("video_task_id")
     
@@ -146,19 +333,98 @@ def parse_webhook_events(task_data: Dict[str, Any]) -> tuple[str, str, List[Dict
                 video_task_id = task_id
     
     # 按时间戳排序事件
-    sorted_events = sorted(
-        webhook_events,
-        key=lambda x: datetime.fromisoformat(x["timestamp"].replace("Z", "+00:00"))
-    )
+    sorted_events = sorted(webhook_events, key=lambda event: _event_epoch(event, epochs))
     
     return script_task_id, video_task_id, sorted_events
 
 
+def _get_parsed_events(
+    snapshot: _TasksSnapshot, task_id: str
+) -> Tuple[Optional[str], Optional[str], List[Dict[str, Any]]]:
+    """获取任务的解析结果，同一份 tasks.json 中的任务只解析、排序一次"""
+    parsed = snapshot.parsed.get(task_id)
+    if parsed is None:
+        parsed = parse_webhook_events(snapshot.data[task_id], snapshot.epochs)
+        snapshot.parsed[task_id] = parsed
+    return parsed
+
+
+@dataclass(frozen=True)
+class ReplayCtx:
+    """单次回放中不变的上下文，在回放开始前构建一次"""
+    script_task_id: str
+    video_task_id: str
+    local_task_id: str
+    download_url: str
+    now_iso: str
+
+
+def _script_progress(ctx: ReplayCtx, message, timestamp):
+    return {
+        "type": "script_generation_progress",
+        "task_id": ctx.script_task_id,
+        "local_task_id": ctx.local_task_id,
+        "message": message or "Processing...",
+        "timestamp": timestamp,
+    }
+
+
+def _script_completed(ctx: ReplayCtx, message, timestamp):
+    return {
+        "type": "script_generation_completed",
+        "task_id": ctx.script_task_id,
+        "local_task_id": ctx.local_task_id,
+        "video_task_id": ctx.video_task_id,
+        "message": "脚本生成完成，开始生成视频",
+        "timestamp": timestamp,
+    }
+
+
+def _video_started(ctx: ReplayCtx, message, timestamp):
+    return {
+        "type": "video_generation_started",
+        "task_id": ctx.video_task_id,
+        "local_task_id": ctx.local_task_id,
+        "message": "视频生成任务已创建",
+        "timestamp": timestamp,
+    }
+
+
+def _video_progress(ctx: ReplayCtx, message, timestamp):
+    return {
+        "type": "video_generation_progress",
+        "task_id": ctx.video_task_id,
+        "local_task_id": ctx.local_task_id,
+        "message": message or "Processing...",
+        "timestamp": timestamp,
+    }
+
+
+def _video_completed(ctx: ReplayCtx, message, timestamp):
+    return {
+        "type": "video_generation_completed",
+        "task_id": ctx.video_task_id,
+        "local_task_id": ctx.local_task_id,
+        "download_url": ctx.download_url,
+        "message": "视频生成完成！",
+        "timestamp": timestamp,
+    }
+
+
+# (事件类型, 任务角色) -> 消息构造函数；不在表中的组合不需要发送给前端
+# task_created 只有视频生成任务需要通知；task_stopped 视为成功完成
+_WS_MESSAGE_BUILDERS = {
+    ("task_created", "video"): _video_started,
+    ("task_progress", "script"): _script_progress,
+    ("task_progress", "video"): _video_progress,
+    ("task_stopped", "script"): _script_completed,
+    ("task_stopped", "video"): _video_completed,
+}
+
+
 def convert_webhook_to_websocket_message(
     event: Dict[str, Any],
-    script_task_id: str,
-    video_task_id: str,
-    local_task_id: str,
+    ctx: ReplayCtx,
 ) -> Optional[Dict[str, Any]]:
     """
     将 webhook 事件转换为 WebSocket 消息
@@ -166,144 +432,214 @@ def convert_webhook_to_websocket_message(
     Returns:
         WebSocket 消息字典，如果不需要发送则返回 None
     """
-    event_type = event.get("event_type")
     raw_payload = event.get("raw_payload", {})
     task_id = raw_payload.get("task_id")
-    message = event.get("message") or raw_payload.get("message")
-    timestamp = event.get("timestamp")
     
     # 判断是脚本生成任务还是视频生成任务
-    is_script_task = task_id == script_task_id
-    is_video_task = task_id == video_task_id
-    
-    if event_type == "task_created":
-        # task_created 事件通常不需要发送给前端
-        # 但如果是视频生成任务的创建，可以发送 video_generation_started
-        if is_video_task:
-            return {
-                "type": "video_generation_started",
-                "task_id": video_task_id,
-                "local_task_id": local_task_id,
-                "message": "视频生成任务已创建",
-                "timestamp": timestamp or datetime.now().isoformat()
-            }
+    if task_id == ctx.script_task_id:
+        role = "script"
+    elif task_id == ctx.video_task_id:
+        role = "video"
+    else:
         return None
     
-    elif event_type == "task_progress":
-        if is_script_task:
-            return {
-                "type": "script_generation_progress",
-                "task_id": script_task_id,
-                "local_task_id": local_task_id,
-                "message": message or "Processing...",
-                "timestamp": timestamp or datetime.now().isoformat()
-            }
-        elif is_video_task:
-            return {
-                "type": "video_generation_progress",
-                "task_id": video_task_id,
-                "local_task_id": local_task_id,
-                "message": message or "Processing...",
-                "timestamp": timestamp or datetime.now().isoformat()
-            }
+    builder = _WS_MESSAGE_BUILDERS.get((event.get("event_type"), role))
+    if builder is None:
         return None
     
-    elif event_type == "task_stopped":
-        # 检查 stop_reason（如果有的话）
-        # 这里假设 finish 表示成功完成
-        if is_script_task:
-            return {
-                "type": "script_generation_completed",
-                "task_id": script_task_id,
-                "local_task_id": local_task_id,
-                "video_task_id": video_task_id,
-                "message": "脚本生成完成，开始生成视频",
-                "timestamp": timestamp or datetime.now().isoformat()
-            }
-        elif is_video_task:
-            # 构建下载 URL
-            download_url = f"/api/video/tasks/{local_task_id}/download"
-            
-            return {
-                "type": "video_generation_completed",
-                "task_id": video_task_id,
-                "local_task_id": local_task_id,
-                "download_url": download_url,
-                "message": "视频生成完成！",
-                "timestamp": timestamp or datetime.now().isoformat()
-            }
-        return None
-    
-    return None
+    message = event.get("message") or raw_payload.get("message")
+    timestamp = event.get("timestamp") or ctx.now_iso
+    return builder(ctx, message, timestamp)
+
+
+@dataclass
+class ReplayStep:
+    """回放计划中的一条消息（构建计划时已序列化，回放时直接发送文本）"""
+
+    __slots__ = ("delay", "task_id", "message_type", "text")
+
+    delay: float                               # 发送前的等待秒数
+    task_id: Optional[str]                     # 消息所属任务 ID（用于查找订阅者）
+    message_type: str
+    text: str                                  # WebSocket 消息 JSON 文本
+
+
+def build_replay_plan(
+    ctx: ReplayCtx,
+    events: List[Dict[str, Any]],
+    speed: float = 1.0,
+    min_delay: float = 0.0,
+    epochs: Optional[Dict[int, float]] = None,
+) -> List[ReplayStep]:
+    """
+    预先计算回放计划：每条需要发送的消息及发送前的等待时间
+
+    - 不需要发送的事件不进入计划，其时间间隔并入下一条消息，避免等待后再跳过
+    - 消息在这里序列化为 JSON 文本，回放循环中不再构造和序列化字典
+    """
+    plan: List[ReplayStep] = []
+    pending = 0.0
+    prev_time = None
+
+    for event in events:
+        current_time = _event_epoch(event, epochs)
+        if prev_time is not None:
+            pending += current_time - prev_time
+        prev_time = current_time
+
+        ws_message = convert_webhook_to_websocket_message(event, ctx)
+        if not ws_message:
+            continue
+
+        # 应用速度倍数并限制最长等待；不再强制最小间隔（除非指定 min_delay），
+        # 密集的进度事件按实际间隔发送，不会把回放总时长拉长
+        delay = min(pending / speed, _MAX_REPLAY_DELAY)
+        if delay > 0:
+            delay = max(delay, min_delay)
+        if delay < _MIN_REPLAY_SLEEP:
+            delay = 0.0
+        plan.append(ReplayStep(
+            delay,
+            ws_message["task_id"],
+            ws_message["type"],
+            orjson.dumps(ws_message).decode(),
+        ))
+        pending = 0.0
+
+    return plan
 
 
 async def replay_webhook_events(
-    local_task_id: str,
-    script_task_id: str,
-    video_task_id: str,
+    ctx: ReplayCtx,
     events: List[Dict[str, Any]],
     speed: float = 1.0,
+    min_delay: float = 0.0,
+    epochs: Optional[Dict[int, float]] = None,
 ):
     """
     回放 webhook 事件，通过 WebSocket 发送消息
     
     Args:
-        local_task_id: 本地任务 ID
-        script_task_id: 脚本生成任务 ID
-        video_task_id: 视频生成任务 ID
+        ctx: 回放上下文（任务 ID、下载地址等）
         events: webhook 事件列表（已按时间排序）
         speed: 回放速度倍数
+        min_delay: 相邻消息的最小间隔秒数
+        epochs: 预先计算的事件时间（id(事件字典) -> 秒，可选）
     """
     if not events:
         logger.warning("没有事件需要回放")
         return
     
-    # 记录开始时间
-    start_time = datetime.now()
-    first_event_time = datetime.fromisoformat(events[0]["timestamp"].replace("Z", "+00:00"))
+    local_task_id = ctx.local_task_id
+    plan = build_replay_plan(ctx, events, speed, min_delay, epochs)
     
-    # 订阅任务（确保消息能发送到前端）
-    # 注意：这里假设前端已经订阅了 local_task_id
-    # 我们还需要订阅 script_task_id 和 video_task_id
+    # 注意：这里假设前端已经订阅了 local_task_id，script_task_id 和 video_task_id 由接口订阅
+    logger.info(
+        f"开始回放任务: local_task_id={local_task_id}, 事件数={len(events)}, "
+        f"消息数={len(plan)}, 速度={speed}x"
+    )
     
-    logger.info(f"开始回放任务: local_task_id={local_task_id}, 事件数={len(events)}, 速度={speed}x")
+    # 按相对回放开始的绝对时间发送：某条消息发送较慢时，只会缩短下一次等待，不会累积延后后续消息
+    # 仍按顺序逐条发送，保证前端收到的消息顺序与事件顺序一致
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
     
-    for i, event in enumerate(events):
-        # 计算延迟
-        if i > 0:
-            current_time = datetime.fromisoformat(event["timestamp"].replace("Z", "+00:00"))
-            prev_time = datetime.fromisoformat(events[i-1]["timestamp"].replace("Z", "+00:00"))
-            delay_seconds = (current_time - prev_time).total_seconds()
-            
-            # 应用速度倍数
-            actual_delay = delay_seconds / speed
-            
-            # 限制延迟范围：最小 0.3 秒，最大 5 秒（避免等待时间过长）
-            if actual_delay > 0:
-                delay = max(0.3, min(actual_delay, 5.0))
-                await asyncio.sleep(delay)
+    for step in plan:
+        deadline += step.delay
+        wait = deadline - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
         
-        # 转换为 WebSocket 消息
-        ws_message = convert_webhook_to_websocket_message(
-            event, script_task_id, video_task_id, local_task_id
+        # 发送给 task_id 和 local_task_id 的订阅者（同一客户端只发送一次）
+        await manager.send_text_to_tasks_subscribers(
+            (step.task_id, local_task_id), step.text, step.message_type
         )
         
-        if ws_message:
-            # 获取任务 ID（用于发送消息）
-            task_id = ws_message.get("task_id")
-            
-            # 发送消息给订阅者
-            if task_id:
-                await manager.send_to_task_subscribers(task_id, ws_message)
-            
-            # 同时发送给 local_task_id 的订阅者
-            await manager.send_to_task_subscribers(local_task_id, ws_message)
-            
-            logger.debug(f"发送 WebSocket 消息: type={ws_message.get('type')}, task_id={task_id}")
+        logger.debug(f"发送 WebSocket 消息: type={step.message_type}, task_id={step.task_id}")
     
     logger.info(f"回放完成: local_task_id={local_task_id}")
 
 
+# 已找到的测试视频路径（只缓存找到的结果，未找到时下次回放重新查找）
+_sample_video_path: Optional[str] = None
+
+
+def _find_sample_video() -> Optional[str]:
+    """查找测试视频文件（找到后缓存）"""
+    global _sample_video_path
+    if _sample_video_path is not None:
+        return _sample_video_path
+    test_video_paths = [
+        Path("static/test/sample_video.mp4"),
+        _PROJECT_ROOT / "static" / "test" / "sample_video.mp4",
+    ]
+    for test_path in test_video_paths:
+        if test_path.exists():
+            _sample_video_path = str(test_path.resolve())
+            return _sample_video_path
+    return None
+
+
+async def _finalize_replay(tracker: TaskTrackerService, task: LocalTask):
+    """回放完成后更新任务状态和视频路径（使用回放开始时取得的任务记录，不再重新读取）"""
+    local_task_id = task.id
+    metadata = dict(task.metadata or {})
+    
+    # 如果没有 video_path，尝试设置测试视频路径
+    if not metadata.get("video_path"):
+        # 首次查找会访问文件系统，放到线程中执行，不阻塞事件循环
+        sample_video = await asyncio.to_thread(_find_sample_video)
+        if sample_video:
+            metadata["video_path"] = sample_video
+            logger.info(f"设置测试视频路径: {metadata['video_path']}")
+    
+    # 更新任务状态和元数据
+    await tracker.update(
+        local_task_id,
+        status="completed",
+        metadata=metadata
+    )
+    logger.info(f"任务状态已更新为完成: local_task_id={local_task_id}")
+
+
+# 进行中的回放任务（保留引用，避免任务被回收）
+_replay_tasks: Set[asyncio.Task] = set()
+
+
+async def cancel_replay_tasks():
+    """取消所有进行中的回放（应用关闭时调用）"""
+    tasks = list(_replay_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_replay_and_finalize(
+    tracker: TaskTrackerService,
+    local_task: LocalTask,
+    ctx: ReplayCtx,
+    events: List[Dict[str, Any]],
+    speed: float,
+    min_delay: float,
+    epochs: Optional[Dict[int, float]] = None,
+):
+    """回放所有事件，实际回放结束后再更新任务状态（回放失败或取消时不更新）"""
+    local_task_id = local_task.id
+    try:
+        await replay_webhook_events(
+            ctx=ctx,
+            events=events,
+            speed=speed,
+            min_delay=min_delay,
+            epochs=epochs,
+        )
+    except Exception as e:
+        logger.error(f"回放失败: local_task_id={local_task_id}, error={e}", exc_info=True)
+        return
+    
+    await _finalize_replay(tracker, local_task)
+
+
 @router.post(
     "/video/tasks/replay",
     response_model=ReplayResponse,
@@ -312,8 +648,8 @@ async def replay_webhook_events(
 )
 async def replay_video_task(
     request: ReplayRequest,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
-    settings=Depends(get_settings),
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
+    settings=Depends(get_settings_dep),
 ):
     """
     回放历史视频生成任务
@@ -323,10 +659,10 @@ async def replay_video_task(
     """
     try:
         # 1. 加载 tasks.json
-        tasks_data = load_tasks_json(settings)
+        snapshot = await _get_tasks_snapshot(settings)
         
         # 2. 查找任务
-        task_data = tasks_data.get(request.task_id)
+        task_data = snapshot.data.get(request.task_id)
         if not task_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -334,15 +670,15 @@ async def replay_video_task(
             )
         
         # 3. 检查是否是视频生成任务
-        metadata = task_data.get("metadata", {})
+        metadata = task_data.get("metadata") or {}
         if metadata.get("task_type") != "video_generation":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"任务 {request.task_id} 不是视频生成任务"
             )
         
-        # 4. 解析 webhook_events
-        script_task_id, video_task_id, sorted_events = parse_webhook_events(task_data)
+        # 4. 解析 webhook_events（结果随 tasks.json 快照缓存）
+        script_task_id, video_task_id, sorted_events = _get_parsed_events(snapshot, request.task_id)
         
         if not script_task_id or not video_task_id:
             raise HTTPException(
@@ -359,40 +695,38 @@ async def replay_video_task(
         # 5. 确定本地任务 ID
         local_task_id = request.local_task_id or request.task_id
         
-        # 6. 检查本地任务是否存在，如果不存在则创建
-        existing_task = await tracker.get(local_task_id)
-        if not existing_task:
+        # 6. 将已有任务更新为 processing，任务不存在时创建
+        local_task = await tracker.update(local_task_id, status="processing")
+        if local_task:
+            logger.info(f"使用现有任务记录: local_task_id={local_task_id}")
+        else:
             # 创建任务记录
             prompt = task_data.get("prompt", f"Replay video task: {request.task_id}")
+            # 元数据复制一份，避免与 tasks.json 缓存共享同一个字典
             local_task = await tracker.create(
                 prompt=prompt,
                 attachments=[],
-            )
-            local_task_id = local_task.id
-            
-            # 更新任务元数据
-            await tracker.update(
-                local_task_id,
+                status="processing",
+                metadata=dict(metadata),
                 manus_task_id=script_task_id,  # 初始设置为 script_task_id
-                metadata=metadata,
-                status="processing"
             )
+            local_task_id = local_task.id
             logger.info(f"创建本地任务记录: local_task_id={local_task_id}")
-        else:
-            # 更新任务状态为 processing
-            await tracker.update(
-                local_task_id,
-                status="processing"
-            )
-            logger.info(f"使用现有任务记录: local_task_id={local_task_id}")
         
         # 7. 订阅任务（确保消息能发送到前端）
         # 如果没有指定 client_id，我们仍然需要确保任务被订阅
         # 前端在收到 script_generation_completed 时会自动订阅 video_task_id
-        if request.client_id and manager.is_connected(request.client_id):
-            await manager.subscribe_task(request.client_id, local_task_id)
-            await manager.subscribe_task(request.client_id, script_task_id)
-            await manager.subscribe_task(request.client_id, video_task_id)
+        # 三个任务一次加锁批量订阅；订阅失败不影响回放本身
+        subscribed = False
+        if request.client_id:
+            try:
+                subscribed = await manager.subscribe_tasks(
+                    request.client_id, [local_task_id, script_task_id, video_task_id]
+                )
+            except Exception as e:
+                logger.error(f"订阅任务失败: client_id={request.client_id}, error={e}")
+        
+        if subscribed:
             logger.info(f"已订阅任务: client_id={request.client_id}")
         else:
             # 如果没有 client_id 或客户端未连接，记录警告
@@ -401,57 +735,36 @@ async def replay_video_task(
         
         # 8. 计算预计持续时间
         if len(sorted_events) > 1:
-            first_time = datetime.fromisoformat(sorted_events[0]["timestamp"].replace("Z", "+00:00"))
-            last_time = datetime.fromisoformat(sorted_events[-1]["timestamp"].replace("Z", "+00:00"))
-            total_duration = (last_time - first_time).total_seconds()
+            total_duration = (
+                _event_epoch(sorted_events[-1], snapshot.epochs)
+                - _event_epoch(sorted_events[0], snapshot.epochs)
+            )
             estimated_duration = total_duration / request.speed
         else:
             estimated_duration = 0.0
         
-        # 9. 异步启动回放任务（不阻塞响应）
-        asyncio.create_task(
-            replay_webhook_events(
-                local_task_id=local_task_id,
-                script_task_id=script_task_id,
-                video_task_id=video_task_id,
+        # 9. 异步执行回放，回放结束后更新任务状态（不阻塞响应）
+        # 回放过程中不变的字符串（下载地址、缺省时间戳）只在这里构建一次
+        ctx = ReplayCtx(
+            script_task_id=script_task_id,
+            video_task_id=video_task_id,
+            local_task_id=local_task_id,
+            download_url=f"/api/video/tasks/{local_task_id}/download",
+            now_iso=datetime.now().isoformat(),
+        )
+        replay_task = asyncio.create_task(
+            _run_replay_and_finalize(
+                tracker=tracker,
+                local_task=local_task,
+                ctx=ctx,
                 events=sorted_events,
                 speed=request.speed,
+                min_delay=request.min_delay,
+                epochs=snapshot.epochs,
             )
         )
-        
-        # 10. 在回放完成后更新任务状态和视频路径
-        async def update_task_status_on_complete():
-            # 等待回放完成（估算时间）
-            await asyncio.sleep(estimated_duration + 2)
-            
-            # 更新任务状态为完成
-            task = await tracker.get(local_task_id)
-            if task:
-                metadata = task.metadata or {}
-                
-                # 如果没有 video_path，尝试设置测试视频路径
-                if not metadata.get("video_path"):
-                    test_video_paths = [
-                        Path("static/test/sample_video.mp4"),
-                        Path("./static/test/sample_video.mp4"),
-                        Path(__file__).parent.parent.parent.parent / "static" / "test" / "sample_video.mp4",
-                    ]
-                    
-                    for test_path in test_video_paths:
-                        if test_path.exists():
-                            metadata["video_path"] = str(test_path.resolve())
-                            logger.info(f"设置测试视频路径: {metadata['video_path']}")
-                            break
-                
-                # 更新任务状态和元数据
-                await tracker.update(
-                    local_task_id, 
-                    status="completed",
-                    metadata=metadata
-                )
-                logger.info(f"任务状态已更新为完成: local_task_id={local_task_id}")
-        
-        asyncio.create_task(update_task_status_on_complete())
+        _replay_tasks.add(replay_task)
+        replay_task.add_done_callback(_replay_tasks.discard)
         
         return ReplayResponse(
             success=True,
@@ -478,30 +791,11 @@ async def replay_video_task(
     summary="获取可回放的任务列表",
     description="列出 tasks.json 中所有可回放的视频生成任务"
 )
-async def list_replayable_tasks(settings=Depends(get_settings)):
+async def list_replayable_tasks(settings=Depends(get_settings_dep)):
     """获取可回放的任务列表"""
     try:
-        tasks_data = load_tasks_json(settings)
-        
-        replayable_tasks = []
-        for task_id, task_data in tasks_data.items():
-            # 处理 metadata 可能为 None 的情况
-            metadata = task_data.get("metadata") or {}
-            
-            # 只处理视频生成任务
-            if metadata.get("task_type") == "video_generation":
-                webhook_events = task_data.get("webhook_events", [])
-                if webhook_events:
-                    replayable_tasks.append({
-                        "task_id": task_id,
-                        "topic": metadata.get("topic", "Unknown"),
-                        "duration": metadata.get("duration"),
-                        "style": metadata.get("style"),
-                        "target_audience": metadata.get("target_audience"),
-                        "status": task_data.get("status"),
-                        "event_count": len(webhook_events),
-                        "created_at": task_data.get("created_at"),
-                    })
+        # 摘要随 tasks.json 缓存一起构建，文件未变化时直接返回
+        replayable_tasks = (await _get_tasks_snapshot(settings)).replayable
         
         return {
             "success": True,
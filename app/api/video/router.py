@@ -3,16 +3,24 @@ Video Service Router - 视频生成服务路由
 """
 
 import logging
+import os
+from datetime import datetime
 from typing import Optional
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from ...schemas.video import VideoTaskRequest, VideoTaskResponse, VideoTaskStatus
 from ...schemas.common import APIResponse
-from ...config import get_settings
-from ...dependencies import get_task_tracker, get_manus_client
+from ...responses import LargeFileResponse, ORJSONResponse
+from ..http_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    etag_matches,
+    revalidate_headers,
+    task_etag,
+)
+from ...dependencies import get_settings_dep, get_task_tracker_dep, get_manus_client
 from ...services import TaskTrackerService
 from ...manus_client import AsyncManusClient
 from ...services.video import VideoGenerationService
@@ -23,6 +31,26 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/video/tasks", tags=["video"])
 
 
+# 已找到的测试视频路径（只缓存找到的结果，未找到时下次请求重新查找）
+_test_video_path: Optional[str] = None
+
+
+def _find_test_video() -> Optional[str]:
+    """查找测试视频文件（找到后缓存，测试视频不会在运行中变化）"""
+    global _test_video_path
+    if _test_video_path is not None:
+        return _test_video_path
+    test_video_paths = [
+        Path("static/test/sample_video.mp4"),
+        Path(__file__).parent.parent.parent.parent / "static" / "test" / "sample_video.mp4",
+    ]
+    for test_path in test_video_paths:
+        if test_path.is_file():
+            _test_video_path = str(test_path)
+            return _test_video_path
+    return None
+
+
 @router.post(
     "",
     response_model=APIResponse[VideoTaskResponse],
@@ -31,8 +59,9 @@ router = APIRouter(prefix="/video/tasks", tags=["video"])
 )
 async def create_video_task(
     request: VideoTaskRequest,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
-    settings=Depends(get_settings),
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
+    client: AsyncManusClient = Depends(get_manus_client),
+    settings=Depends(get_settings_dep),
 ):
     """
     创建视频生成任务
@@ -53,13 +82,13 @@ async def create_video_task(
         )
 
         # 1. 验证 style 和 target_audience 是否在支持的列表中
-        if request.style not in settings.video_supported_styles:
+        if request.style not in settings.video_supported_styles_set:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"不支持的视频风格: {request.style}。支持的风格: {settings.video_supported_styles}",
             )
 
-        if request.target_audience not in settings.video_supported_audiences:
+        if request.target_audience not in settings.video_supported_audiences_set:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"不支持的目标受众: {request.target_audience}。支持的受众: {settings.video_supported_audiences}",
@@ -72,16 +101,7 @@ async def create_video_task(
                 detail="Webhook 模式未启用，视频生成需要 Webhook 支持。请配置 WEBHOOK_ENABLED=true",
             )
 
-        # 3. 创建本地任务记录（参数自动保存到 metadata）
-        # 构建 prompt（用于任务记录）
-        prompt = f"Generate video: {request.topic} ({request.duration}s, {request.style}, {request.target_audience})"
-
-        local_task = await tracker.create(
-            prompt=prompt,
-            attachments=[],
-        )
-
-        # 保存视频生成相关参数到 metadata
+        # 3. 创建本地任务记录（视频生成相关参数保存到 metadata，状态和参数一次写入）
         metadata = {
             "task_type": "video_generation",
             "step": "script_generation",
@@ -93,57 +113,51 @@ async def create_video_task(
         if request.client_id:
             metadata["client_id"] = request.client_id
 
-        await tracker.update(
-            local_task.id,
-            metadata=metadata,
+        # 参数都在 metadata 中，prompt 只作为任务列表中显示的标签，直接使用主题
+        local_task = await tracker.create(
+            prompt=request.topic,
             status="processing",
+            metadata=metadata,
         )
 
         # 4. 订阅 WebSocket 更新
-        if request.client_id and manager.is_connected(request.client_id):
-            await manager.subscribe_task(request.client_id, local_task.id)
+        if await manager.subscribe_if_connected(request.client_id, local_task.id):
             logger.info(f"已订阅任务更新: client_id={request.client_id}, task_id={local_task.id}")
 
         # 5. 调用视频生成服务启动脚本生成（参数从 metadata 中获取）
-        async for client in get_manus_client():
-            video_service = VideoGenerationService(client, tracker)
-
-            try:
-                result = await video_service.generate_video(
-                    topic=request.topic,
-                    duration=request.duration,
-                    style=request.style,
-                    target_audience=request.target_audience,
-                    local_task_id=local_task.id,
-                )
-
-                script_task_id = result.get("script_task_id")
-
-                # 订阅脚本生成任务 ID
-                if request.client_id and manager.is_connected(request.client_id) and script_task_id:
-                    await manager.subscribe_task(request.client_id, script_task_id)
-                    logger.info(f"已订阅脚本生成任务: client_id={request.client_id}, script_task_id={script_task_id}")
-
-                # 更新 metadata 中的 script_task_id
-                metadata["script_task_id"] = script_task_id
-                await tracker.update(local_task.id, metadata=metadata)
-
-                logger.info(f"视频生成任务已创建: local_task_id={local_task.id}, script_task_id={script_task_id}")
-
-                # 6. 返回任务 ID 和状态
-                return APIResponse(
-                    success=True,
-                    data=VideoTaskResponse(
-                        task_id=local_task.id,
-                        status=VideoTaskStatus.PROCESSING,
-                        step="script_generation",
-                        message="任务创建成功，脚本生成中",
-                    ),
-                    message="视频生成任务创建成功",
-                )
-
-            finally:
-                await client.close()
+        # 使用全局共享的 Manus 客户端，复用连接池，不在请求结束时关闭
+        video_service = VideoGenerationService(client, tracker)
+
+        result = await video_service.generate_video(
+            topic=request.topic,
+            duration=request.duration,
+            style=request.style,
+            target_audience=request.target_audience,
+            local_task_id=local_task.id,
+        )
+
+        script_task_id = result.get("script_task_id")
+
+        # 订阅脚本生成任务 ID
+        if script_task_id and await manager.subscribe_if_connected(request.client_id, script_task_id):
+            logger.info(f"已订阅脚本生成任务: client_id={request.client_id}, script_task_id={script_task_id}")
+
+        # 更新 metadata 中的 script_task_id（生成后唯一一次写入）
+        await tracker.update(local_task.id, metadata={**metadata, "script_task_id": script_task_id})
+
+        logger.info(f"视频生成任务已创建: local_task_id={local_task.id}, script_task_id={script_task_id}")
+
+        # 6. 返回任务 ID 和状态
+        return APIResponse(
+            success=True,
+            data=VideoTaskResponse(
+                task_id=local_task.id,
+                status=VideoTaskStatus.PROCESSING,
+                step="script_generation",
+                message="任务创建成功，脚本生成中",
+            ),
+            message="视频生成任务创建成功",
+        )
 
     except HTTPException:
         raise
@@ -163,13 +177,16 @@ async def create_video_task(
 )
 async def get_video_task(
     task_id: str,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
-    settings=Depends(get_settings),
+    request: Request,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
     """
     查询视频生成任务
 
     - **task_id**: 任务 ID（本地任务 ID）
+
+    带基于更新时间的 ETag，轮询时任务未变化返回 304；
+    响应直接按 APIResponse[VideoTaskResponse] 的结构构建字典，不经过模型校验
     """
     try:
         logger.info(f"查询视频生成任务: task_id={task_id}")
@@ -191,6 +208,11 @@ async def get_video_task(
                 detail=f"任务 {task_id} 不是视频生成任务",
             )
 
+        # 任务未变化时直接返回 304，不再构建响应
+        headers = revalidate_headers(task_etag(task))
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
         # 3. 获取任务状态、当前步骤
         task_step = metadata.get("step", "script_generation")
         
@@ -217,17 +239,21 @@ async def get_video_task(
                 markdown_url = f"/api/video/tasks/{task_id}/markdown"
 
         # 5. 返回任务信息
-        return APIResponse(
-            success=True,
-            data=VideoTaskResponse(
-                task_id=task_id,
-                status=task_status,
-                step=task_step,
-                video_url=video_url,
-                markdown_url=markdown_url,
-                message=f"任务状态: {task.status}, 当前步骤: {task_step}",
-            ),
-            message="查询成功",
+        return ORJSONResponse(
+            {
+                "success": True,
+                "data": {
+                    "task_id": task_id,
+                    "status": task_status.value,
+                    "step": task_step,
+                    "video_url": video_url,
+                    "markdown_url": markdown_url,
+                    "message": f"任务状态: {task.status}, 当前步骤: {task_step}",
+                },
+                "message": "查询成功",
+                "timestamp": datetime.utcnow(),
+            },
+            headers=headers,
         )
 
     except HTTPException:
@@ -248,8 +274,7 @@ async def get_video_task(
 async def download_video(
     task_id: str,
     inline: bool = False,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
-    settings=Depends(get_settings),
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
     """
     下载或播放生成的视频文件
@@ -283,18 +308,10 @@ async def download_video(
         
         # 如果是测试模式且没有视频文件，尝试使用测试视频文件
         if not video_path_str and is_test_mode:
-            # 尝试查找测试视频文件
-            test_video_paths = [
-                Path("static/test/sample_video.mp4"),
-                Path("./static/test/sample_video.mp4"),
-                Path(__file__).parent.parent.parent.parent / "static" / "test" / "sample_video.mp4",
-            ]
-            
-            for test_path in test_video_paths:
-                if test_path.exists():
-                    video_path_str = str(test_path)
-                    logger.info(f"使用测试视频文件: {video_path_str}")
-                    break
+            # 尝试查找测试视频文件（首次查找访问文件系统，放到线程中执行）
+            video_path_str = await anyio.to_thread.run_sync(_find_test_video)
+            if video_path_str:
+                logger.info(f"使用测试视频文件: {video_path_str}")
         
         if not video_path_str:
             raise HTTPException(
@@ -304,8 +321,10 @@ async def download_video(
 
         video_path = Path(video_path_str)
 
-        # 4. 验证文件是否存在
-        if not video_path.exists():
+        # 4. 验证文件是否存在（stat 放到线程中执行，结果直接交给文件响应，避免重复 stat）
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, video_path)
+        except FileNotFoundError:
             logger.error(f"视频文件不存在: {video_path}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -315,16 +334,22 @@ async def download_video(
         # 5. 根据 inline 参数决定 Content-Disposition
         disposition = "inline" if inline else "attachment"
         
-        # 6. 返回文件响应
+        headers = {
+            "Content-Disposition": f'{disposition}; filename="{video_path.name}"',
+            "Accept-Ranges": "bytes",  # 支持范围请求，用于视频播放和拖动进度
+        }
+        # 已完成任务的视频不再变化，允许长期缓存；测试模式的示例视频之后会被真实视频替换，不缓存
+        if not is_test_mode:
+            headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+        # 6. 返回文件响应（ETag / Last-Modified 由文件响应根据 stat 结果生成）
         logger.info(f"返回视频文件: {video_path}, disposition={disposition}")
-        return FileResponse(
+        return LargeFileResponse(
             path=str(video_path),
             filename=video_path.name,
             media_type="video/mp4",
-            headers={
-                "Content-Disposition": f'{disposition}; filename="{video_path.name}"',
-                "Accept-Ranges": "bytes",  # 支持范围请求，用于视频播放
-            },
+            stat_result=stat_result,
+            headers=headers,
         )
 
     except HTTPException:
@@ -344,8 +369,7 @@ async def download_video(
 )
 async def download_markdown(
     task_id: str,
-    tracker: TaskTrackerService = Depends(get_task_tracker),
-    settings=Depends(get_settings),
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
 ):
     """
     下载 Markdown 文件
@@ -385,7 +409,9 @@ async def download_markdown(
         markdown_path = Path(markdown_path_str)
 
         # 4. 验证文件是否存在
-        if not markdown_path.exists():
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, markdown_path)
+        except FileNotFoundError:
             logger.error(f"Markdown 文件不存在: {markdown_path}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -394,10 +420,11 @@ async def download_markdown(
 
         # 5. 返回文件响应
         logger.info(f"返回 Markdown 文件: {markdown_path}")
-        return FileResponse(
+        return LargeFileResponse(
             path=str(markdown_path),
             filename=markdown_path.name,
             media_type="text/markdown",
+            stat_result=stat_result,
             headers={
                 "Content-Disposition": f'attachment; filename="{markdown_path.name}"',
             },
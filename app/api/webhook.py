@@ -4,17 +4,27 @@ Webhook API 端点
 接收 Manus API 的 Webhook 回调，处理任务状态更新
 """
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Optional, Dict, Any
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Optional, Dict, Any, Set, Callable, Awaitable, NamedTuple
 
-from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, HTTPException, BackgroundTasks
+from pydantic import BaseModel, ConfigDict, ValidationError
 
+from app.config import Settings, get_settings
 from app.websocket import manager
-from app.dependencies import get_task_tracker, get_ppt_generator
-from app.manus_client import AsyncManusClient
-from app.services.video import VideoGenerationService
+from app.dependencies import (
+    get_settings_dep,
+    get_task_tracker,
+    get_task_tracker_dep,
+    get_ppt_generator,
+    get_video_service,
+)
+from app.services import TaskTrackerService, WebhookEventQueue
 
 logger = logging.getLogger(__name__)
 
@@ -41,8 +51,21 @@ class ProgressDetail(BaseModel):
     message: Optional[str] = None
 
 
+class ResolvedPayload(NamedTuple):
+    """从嵌套或扁平结构中解析出的事件字段"""
+    task_id: Optional[str]
+    task_title: Optional[str]
+    task_url: Optional[str]
+    status: Optional[str]
+    message: Optional[str]
+    stop_reason: Optional[str]
+
+
 class ManusWebhookPayload(BaseModel):
     """Manus Webhook 回调数据结构（支持嵌套结构）"""
+    # 事件数据只读，resolved 解析结果可以安全缓存
+    model_config = ConfigDict(frozen=True)
+    
     event_id: str
     event_type: str  # task_created, task_progress, task_stopped
     
@@ -57,46 +80,93 @@ class ManusWebhookPayload(BaseModel):
     status: Optional[str] = None
     message: Optional[str] = None
     
+    @cached_property
+    def resolved(self) -> ResolvedPayload:
+        """一次解析所有字段（优先从嵌套结构），后续访问直接读取缓存结果"""
+        if self.task_detail:
+            detail = self.task_detail
+            return ResolvedPayload(
+                task_id=detail.task_id,
+                task_title=detail.task_title,
+                task_url=detail.task_url,
+                status=detail.status,
+                message=detail.message,
+                stop_reason=detail.stop_reason,
+            )
+        if self.progress_detail:
+            return ResolvedPayload(
+                task_id=self.progress_detail.task_id,
+                task_title=self.task_title,
+                task_url=self.task_url,
+                status=self.status,
+                message=self.progress_detail.message,
+                stop_reason=None,
+            )
+        return ResolvedPayload(
+            task_id=self.task_id,
+            task_title=self.task_title,
+            task_url=self.task_url,
+            status=self.status,
+            message=self.message,
+            stop_reason=None,
+        )
+    
     def get_task_id(self) -> str:
         """获取 task_id（优先从嵌套结构）"""
-        if self.task_detail:
-            return self.task_detail.task_id
-        elif self.progress_detail:
-            return self.progress_detail.task_id
-        elif self.task_id:
-            return self.task_id
-        else:
+        task_id = self.resolved.task_id
+        if task_id is None:
             raise ValueError("无法找到 task_id")
+        return task_id
     
     def get_task_title(self) -> Optional[str]:
         """获取 task_title"""
-        if self.task_detail:
-            return self.task_detail.task_title
-        return self.task_title
+        return self.resolved.task_title
     
     def get_task_url(self) -> Optional[str]:
         """获取 task_url"""
-        if self.task_detail:
-            return self.task_detail.task_url
-        return self.task_url
+        return self.resolved.task_url
     
     def get_status(self) -> Optional[str]:
         """获取 status"""
-        if self.task_detail:
-            return self.task_detail.status
-        return self.status
+        return self.resolved.status
     
     def get_message(self) -> Optional[str]:
         """获取 message"""
-        if self.task_detail:
-            return self.task_detail.message
-        elif self.progress_detail:
-            return self.progress_detail.message
-        return self.message
+        return self.resolved.message
 
 
 # ========== Webhook 端点 ==========
 
+# Webhook 请求体大小限制 256KB（正常事件只有几 KB）
+MAX_WEBHOOK_BODY_SIZE = 256 * 1024
+
+
+async def _read_webhook_body(request: Request) -> bytes:
+    """
+    读取 Webhook 请求体，超过大小限制时立即中止
+
+    先检查 Content-Length，未声明长度（分块传输）时边读边累计，不读取剩余内容
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_WEBHOOK_BODY_SIZE:
+        raise _body_too_large()
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_WEBHOOK_BODY_SIZE:
+            raise _body_too_large()
+    return bytes(body)
+
+
+def _body_too_large() -> HTTPException:
+    """请求体超过大小限制时的异常"""
+    return HTTPException(
+        status_code=413,
+        detail=f"Webhook payload too large, max {MAX_WEBHOOK_BODY_SIZE} bytes",
+    )
+
+
 @router.post("/manus")
 async def manus_webhook(
     request: Request,
@@ -115,70 +185,159 @@ async def manus_webhook(
     - task_stopped: 任务停止（完成或需要输入）
     """
     try:
-        # 先读取原始请求体，用于调试
-        raw_body = await request.body()
-        logger.info(f"[Webhook] 收到原始请求体: {raw_body.decode('utf-8')[:500]}")
-        
-        # 尝试解析 JSON
-        import json
-        try:
-            raw_data = json.loads(raw_body)
-            logger.info(f"[Webhook] 解析后的 JSON 数据: {json.dumps(raw_data, ensure_ascii=False, indent=2)[:1000]}")
-        except json.JSONDecodeError as e:
-            logger.error(f"[Webhook] JSON 解析失败: {e}, 原始数据: {raw_body[:200]}")
-            return {"status": "error", "message": "Invalid JSON"}, 400
+        raw_body = await _read_webhook_body(request)
+        # 原始请求体只在调试日志中输出（只截取前 500 字节解码，不解码整个请求体）
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[Webhook] 收到原始请求体: %s", raw_body[:500].decode('utf-8', errors='replace'))
         
-        # 尝试解析为 Pydantic 模型
+        # 直接从原始请求体解析并验证（pydantic-core 一次完成，不构建中间字典）
         try:
-            payload = ManusWebhookPayload(**raw_data)
-            logger.info(f"[Webhook] Pydantic 验证成功: event_type={payload.event_type}, task_id={payload.task_id}")
-        except Exception as e:
-            logger.error(f"[Webhook] Pydantic 验证失败: {e}")
-            logger.error(f"[Webhook] 原始数据键: {list(raw_data.keys()) if isinstance(raw_data, dict) else 'not dict'}")
-            logger.error(f"[Webhook] 错误详情: {str(e)}")
+            payload = ManusWebhookPayload.model_validate_json(raw_body)
+            logger.info("[Webhook] Pydantic 验证成功: event_type=%s, task_id=%s", payload.event_type, payload.task_id)
+        except ValidationError as e:
+            if any(err["type"] == "json_invalid" for err in e.errors()):
+                logger.error("[Webhook] JSON 解析失败: %s, 原始数据: %s", e, raw_body[:200])
+                return {"status": "error", "message": "Invalid JSON"}, 400
+            logger.error("[Webhook] Pydantic 验证失败: %s", e)
+            logger.error("[Webhook] 原始数据: %s", raw_body[:500])
             # 返回 200 避免 Manus 重试，但记录错误
             return {"status": "ok", "received": False, "error": "validation failed"}
         
-        # 立即返回 200，在后台处理
-        background_tasks.add_task(
-            handle_webhook_event,
-            payload
-        )
+        # Manus 超时重试会重复推送同一事件，已收到过的事件直接确认，不再处理
+        if not _mark_event_seen(payload.event_id):
+            logger.info("[Webhook] 重复事件，跳过: event_id=%s", payload.event_id)
+            return {"status": "ok", "received": True, "duplicate": True}
+        
+        # 立即返回 200，事件交给处理队列；只有队列未启动时才退回到后台任务处理
+        if _event_queue is not None and _event_queue.is_running:
+            if not _enqueue_event(payload):
+                # 队列已满：不能绕过队列处理（会打乱同一任务的事件顺序），
+                # 撤销去重记录并返回 503，由 Manus 稍后重新推送
+                _seen_events.pop(payload.event_id, None)
+                logger.warning("[Webhook] 事件队列已满，要求重试: event_id=%s", payload.event_id)
+                raise HTTPException(
+                    status_code=503,
+                    detail="Webhook event queue is full, please retry later",
+                )
+        else:
+            background_tasks.add_task(
+                handle_webhook_event,
+                payload
+            )
         
         return {"status": "ok", "received": True}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"[Webhook] 处理请求异常: {e}", exc_info=True)
+        logger.error("[Webhook] 处理请求异常: %s", e, exc_info=True)
         # 即使出错也返回 200，避免 Manus 重试
         return {"status": "error", "message": str(e)}
 
 
+# 最近收到的事件 ID -> 收到时间（monotonic），用于过滤重试推送的重复事件
+_seen_events: "OrderedDict[str, float]" = OrderedDict()
+_SEEN_EVENT_TTL = 600.0
+_SEEN_EVENT_MAX = 10000
+
+
+def _mark_event_seen(event_id: str) -> bool:
+    """
+    记录事件 ID
+
+    Returns:
+        是否首次收到（有效期内重复收到时返回 False）
+    """
+    now = time.monotonic()
+    
+    # 按收到顺序淘汰过期或超出数量上限的记录
+    while _seen_events:
+        oldest_id, seen_at = next(iter(_seen_events.items()))
+        if now - seen_at < _SEEN_EVENT_TTL and len(_seen_events) < _SEEN_EVENT_MAX:
+            break
+        _seen_events.popitem(last=False)
+    
+    if event_id in _seen_events:
+        return False
+    _seen_events[event_id] = now
+    return True
+
+
+# Webhook 事件处理队列（应用启动时创建）
+_event_queue: Optional[WebhookEventQueue] = None
+
+
+async def start_webhook_queue():
+    """启动 Webhook 事件处理队列（应用启动时调用）"""
+    global _event_queue
+    if _event_queue is None:
+        settings = get_settings()
+        _event_queue = WebhookEventQueue(
+            handler=handle_webhook_event,
+            workers=settings.webhook_workers,
+            max_queue=settings.webhook_max_queue,
+        )
+    await _event_queue.start()
+
+
+async def stop_webhook_queue():
+    """停止 Webhook 事件处理队列，并取消进行中的 PPTX 下载（应用关闭时调用）"""
+    global _event_queue
+    if _event_queue:
+        await _event_queue.stop()
+        _event_queue = None
+    
+    tasks = list(_download_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _enqueue_event(payload: ManusWebhookPayload) -> bool:
+    """事件入队，同一任务的事件进入同一个 worker"""
+    if _event_queue is None:
+        return False
+    try:
+        key = payload.get_task_id()
+    except ValueError:
+        key = payload.event_id
+    return _event_queue.enqueue(key, payload)
+
+
+def _utc_now_iso() -> str:
+    """Webhook 推送消息的时间戳（UTC，带时区）"""
+    return datetime.now(timezone.utc).isoformat()
+
+
 async def handle_webhook_event(payload: ManusWebhookPayload):
     """
     后台处理 Webhook 事件
     """
     try:
         task_id = payload.get_task_id()
-        logger.info(f"[Webhook] 开始处理事件: event_type={payload.event_type}, task_id={task_id}")
+        resolved = payload.resolved
+        logger.info("[Webhook] 开始处理事件: event_type=%s, task_id=%s", payload.event_type, task_id)
         
         tracker = get_task_tracker()
+        # 同一事件推送的所有消息共用一个时间戳
+        timestamp = _utc_now_iso()
         
         # 记录 Webhook 事件到任务
         event = await tracker.add_webhook_event(
             task_id=task_id,
             event_id=payload.event_id,
             event_type=payload.event_type,
-            status=payload.get_status(),
-            message=payload.get_message(),
+            status=resolved.status,
+            message=resolved.message,
             raw_payload={
                 "task_id": task_id,
-                "task_title": payload.get_task_title(),
-                "task_url": payload.get_task_url(),
-                "status": payload.get_status(),
-                "message": payload.get_message(),
+                "task_title": resolved.task_title,
+                "task_url": resolved.task_url,
+                "status": resolved.status,
+                "message": resolved.message,
             }
         )
-        logger.info(f"[Webhook] 事件已记录: event_id={payload.event_id}")
+        logger.info("[Webhook] 事件已记录: event_id=%s", payload.event_id)
         
         # 推送事件到所有订阅者
         await manager.send_to_task_subscribers(task_id, {
@@ -186,44 +345,35 @@ async def handle_webhook_event(payload: ManusWebhookPayload):
             "event_id": payload.event_id,
             "event_type": payload.event_type,
             "task_id": task_id,
-            "status": payload.get_status(),
-            "message": payload.get_message(),
-            "timestamp": datetime.now().isoformat()
+            "status": resolved.status,
+            "message": resolved.message,
+            "timestamp": timestamp
         })
-        logger.info(f"[Webhook] 事件已推送给订阅者")
+        logger.info("[Webhook] 事件已推送给订阅者")
         
-        # 根据事件类型处理
-        if payload.event_type == "task_created":
-            logger.info(f"[Webhook] 处理 task_created 事件")
-            await handle_task_created(payload, tracker)
-            
-        elif payload.event_type == "task_progress":
-            logger.info(f"[Webhook] 处理 task_progress 事件")
-            await handle_task_progress(payload, tracker, task_id)
-            
-        elif payload.event_type == "task_stopped":
-            logger.info(f"[Webhook] 处理 task_stopped 事件")
-            await handle_task_stopped(payload, tracker)
-            
-        else:
-            logger.warning(f"[Webhook] 未知的 Webhook 事件类型: {payload.event_type}")
+        # 根据事件类型分发处理
+        handler = _EVENT_HANDLERS.get(payload.event_type)
+        if handler is None:
+            logger.warning("[Webhook] 未知的 Webhook 事件类型: %s", payload.event_type)
+            return
+        
+        logger.info("[Webhook] 处理 %s 事件", payload.event_type)
+        await handler(payload, tracker, task_id, timestamp)
             
     except Exception as e:
-        logger.error(f"[Webhook] 处理 Webhook 事件失败: {e}", exc_info=True)
+        logger.error("[Webhook] 处理 Webhook 事件失败: %s", e, exc_info=True)
 
 
-async def handle_task_created(payload: ManusWebhookPayload, tracker):
+async def handle_task_created(payload: ManusWebhookPayload, tracker, task_id: str, timestamp: str):
     """处理任务创建事件"""
-    task_id = payload.get_task_id()
-    task_title = payload.get_task_title()
-    task_url = payload.get_task_url()
+    task_title, task_url = payload.resolved.task_title, payload.resolved.task_url
     
-    logger.info(f"[Webhook] 任务已创建: task_id={task_id}, title={task_title}")
+    logger.info("[Webhook] 任务已创建: task_id=%s, title=%s", task_id, task_title)
     
     # 更新本地任务状态
     local_task = await tracker.find_by_manus_task_id(task_id)
     if local_task:
-        logger.info(f"[Webhook] 找到本地任务: {local_task['id']}, 更新状态")
+        logger.info("[Webhook] 找到本地任务: %s, 更新状态", local_task['id'])
         await tracker.update(
             local_task["id"],
             title=task_title,
@@ -231,7 +381,7 @@ async def handle_task_created(payload: ManusWebhookPayload, tracker):
             status="processing"
         )
     else:
-        logger.warning(f"[Webhook] 未找到本地任务: task_id={task_id}")
+        logger.warning("[Webhook] 未找到本地任务: task_id=%s", task_id)
     
     # 通过 WebSocket 通知前端
     await manager.send_to_task_subscribers(task_id, {
@@ -240,15 +390,15 @@ async def handle_task_created(payload: ManusWebhookPayload, tracker):
         "title": task_title,
         "task_url": task_url,
         "message": "任务已创建，正在处理中...",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": timestamp
     })
 
 
-async def handle_task_progress(payload: ManusWebhookPayload, tracker, task_id: str):
+async def handle_task_progress(payload: ManusWebhookPayload, tracker, task_id: str, timestamp: str):
     """处理任务进度事件"""
-    message = payload.get_message()
+    message = payload.resolved.message
     
-    logger.info(f"[Webhook] 任务进度更新: task_id={task_id}, message={message}")
+    logger.info("[Webhook] 任务进度更新: task_id=%s, message=%s", task_id, message)
     
     # 检查是否是视频生成任务
     local_task = await tracker.find_by_manus_task_id(task_id)
@@ -257,18 +407,17 @@ async def handle_task_progress(payload: ManusWebhookPayload, tracker, task_id: s
     
     if local_task:
         local_task_id = local_task["id"]
-        task_data = await tracker.get(local_task_id)
-        if task_data:
-            metadata = task_data.metadata or {}
-            task_type = metadata.get("task_type")
-            task_step = metadata.get("step")
-            
-            if task_type == "video_generation":
-                # 根据步骤确定进度类型
-                if task_step == "script_generation":
-                    progress_type = "script_generation_progress"
-                elif task_step == "video_generation":
-                    progress_type = "video_generation_progress"
+        # 查找结果已包含 metadata，无需再次读取任务
+        metadata = local_task.get("metadata") or {}
+        task_type = metadata.get("task_type")
+        task_step = metadata.get("step")
+        
+        if task_type == "video_generation":
+            # 根据步骤确定进度类型
+            if task_step == "script_generation":
+                progress_type = "script_generation_progress"
+            elif task_step == "video_generation":
+                progress_type = "video_generation_progress"
     else:
         # 如果找不到 local_task，可能是 video_task_id 或 script_task_id
         # 尝试通过 metadata 查找（作为后备方案）
@@ -294,123 +443,187 @@ async def handle_task_progress(payload: ManusWebhookPayload, tracker, task_id: s
         "type": progress_type,
         "task_id": task_id,
         "message": message,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": timestamp
     }
     if local_task_id:
         progress_msg["local_task_id"] = local_task_id
     
     # 通过 WebSocket 通知前端
-    # 发送给 task_id 的订阅者（可能是 script_task_id 或 video_task_id）
-    await manager.send_to_task_subscribers(task_id, progress_msg)
-    # 如果找到 local_task_id，也发送给 local_task_id 的订阅者
-    if local_task_id:
-        await manager.send_to_task_subscribers(local_task_id, progress_msg)
+    # 发送给 task_id（可能是 script_task_id 或 video_task_id）和 local_task_id 的订阅者
+    # 同一客户端只发送一次，消息只序列化一次
+    await manager.send_to_tasks_subscribers((task_id, local_task_id), progress_msg)
 
 
-async def handle_task_stopped(payload: ManusWebhookPayload, tracker):
+async def handle_task_stopped(payload: ManusWebhookPayload, tracker, task_id: str, timestamp: str):
     """处理任务停止事件（完成或需要输入）"""
-    task_id = payload.get_task_id()
-    task_title = payload.get_task_title()
-    status = payload.get_status()
-    message = payload.get_message()
-    stop_reason = payload.task_detail.stop_reason if payload.task_detail else None
+    resolved = payload.resolved
+    stop_reason = resolved.stop_reason
     
-    logger.info(f"[Webhook] 任务停止: task_id={task_id}, status={status}, stop_reason={stop_reason}")
+    logger.info("[Webhook] 任务停止: task_id=%s, status=%s, stop_reason=%s", task_id, resolved.status, stop_reason)
     
     local_task = await tracker.find_by_manus_task_id(task_id)
     
+    # 按停止原因分发，其他情况（可能是失败）按失败处理
+    handler = _STOP_HANDLERS.get(stop_reason, _handle_task_failed)
+    await handler(payload, tracker, task_id, local_task, timestamp)
+
+
+async def _handle_task_finished(
+    payload: ManusWebhookPayload,
+    tracker,
+    task_id: str,
+    local_task: Optional[Dict[str, Any]],
+    timestamp: str,
+):
+    """任务完成：视频任务进入下一步骤，PPT 任务触发下载"""
     # 检查是否是视频生成任务
     is_video_task = False
     task_step = None
     if local_task:
-        task_data = await tracker.get(local_task["id"])
-        if task_data:
-            metadata = task_data.metadata or {}
-            task_type = metadata.get("task_type")
-            task_step = metadata.get("step")
-            is_video_task = task_type == "video_generation"
-            logger.info(f"[Webhook] 任务类型: task_type={task_type}, step={task_step}, is_video_task={is_video_task}")
-    
-    if stop_reason == "finish":
-        if is_video_task:
-            # 视频生成任务完成处理
-            await handle_video_task_stopped(
-                payload, tracker, local_task, task_step, task_id
-            )
-        else:
-            # PPT 生成任务完成 - 触发下载
-            logger.info(f"[Webhook] PPT 任务完成，开始下载 PPTX: task_id={task_id}")
-            
-            if local_task:
-                # 异步下载 PPTX
-                try:
-                    ppt_generator = await get_ppt_generator()
-                    await ppt_generator.download_completed_task(task_id)
-                    
-                    # 重新获取更新后的任务信息
-                    updated_task = await tracker.get(local_task["id"])
-                    
-                    await manager.send_to_task_subscribers(task_id, {
-                        "type": "task_completed",
-                        "task_id": task_id,
-                        "local_task_id": local_task["id"],
-                        "title": (updated_task.title if updated_task else None) or task_title,
-                        "download_url": f"/api/tasks/{local_task['id']}/download",
-                        "message": "PPT 生成完成！",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    logger.info(f"[Webhook] 任务完成通知已发送")
-                except Exception as e:
-                    logger.error(f"[Webhook] 下载 PPTX 失败: {e}", exc_info=True)
-                    await manager.send_to_task_subscribers(task_id, {
-                        "type": "task_failed",
-                        "task_id": task_id,
-                        "error": f"下载失败: {str(e)}",
-                        "timestamp": datetime.now().isoformat()
-                    })
-            else:
-                logger.warning(f"[Webhook] 任务完成但未找到本地任务: task_id={task_id}")
-                await manager.send_to_task_subscribers(task_id, {
-                    "type": "task_completed",
-                    "task_id": task_id,
-                    "title": task_title,
-                    "message": "PPT 生成完成！",
-                    "timestamp": datetime.now().isoformat()
-                })
-        
-    elif stop_reason == "ask":
-        # 需要用户输入
-        logger.info(f"[Webhook] 任务需要用户输入: task_id={task_id}")
-        
-        if local_task:
-            await tracker.update(
-                local_task["id"],
-                status="pending"
-            )
-        
+        # 查找结果已包含 metadata，无需再次读取任务
+        metadata = local_task.get("metadata") or {}
+        task_type = metadata.get("task_type")
+        task_step = metadata.get("step")
+        is_video_task = task_type == "video_generation"
+        logger.info("[Webhook] 任务类型: task_type=%s, step=%s, is_video_task=%s", task_type, task_step, is_video_task)
+    
+    if is_video_task:
+        # 视频生成任务完成处理
+        await handle_video_task_stopped(
+            payload, tracker, local_task, task_step, task_id, timestamp
+        )
+        return
+    
+    # PPT 生成任务完成 - 触发下载
+    logger.info("[Webhook] PPT 任务完成，开始下载 PPTX: task_id=%s", task_id)
+    task_title = payload.resolved.task_title
+    
+    if local_task:
+        # 下载可能耗时数秒，放到独立的后台任务中执行，不占用事件处理 worker
         await manager.send_to_task_subscribers(task_id, {
-            "type": "task_ask",
+            "type": "task_progress",
             "task_id": task_id,
-            "message": message or "任务需要您的输入",
-            "timestamp": datetime.now().isoformat()
+            "local_task_id": local_task["id"],
+            "message": "PPT 生成完成，正在下载文件...",
+            "timestamp": timestamp
         })
-        
+        download_task = asyncio.create_task(
+            _download_pptx_and_notify(tracker, task_id, local_task["id"], task_title)
+        )
+        _download_tasks.add(download_task)
+        download_task.add_done_callback(_download_tasks.discard)
     else:
-        # 其他情况（可能是失败）
-        logger.warning(f"[Webhook] 未知的 stop_reason: {stop_reason}, task_id={task_id}")
+        logger.warning("[Webhook] 任务完成但未找到本地任务: task_id=%s", task_id)
+        await manager.send_to_task_subscribers(task_id, {
+            "type": "task_completed",
+            "task_id": task_id,
+            "title": task_title,
+            "message": "PPT 生成完成！",
+            "timestamp": timestamp
+        })
+
+
+async def _handle_task_ask(
+    payload: ManusWebhookPayload,
+    tracker,
+    task_id: str,
+    local_task: Optional[Dict[str, Any]],
+    timestamp: str,
+):
+    """任务需要用户输入"""
+    logger.info("[Webhook] 任务需要用户输入: task_id=%s", task_id)
+    
+    if local_task:
+        await tracker.update(
+            local_task["id"],
+            status="pending"
+        )
+    
+    await manager.send_to_task_subscribers(task_id, {
+        "type": "task_ask",
+        "task_id": task_id,
+        "message": payload.resolved.message or "任务需要您的输入",
+        "timestamp": timestamp
+    })
+
+
+async def _handle_task_failed(
+    payload: ManusWebhookPayload,
+    tracker,
+    task_id: str,
+    local_task: Optional[Dict[str, Any]],
+    timestamp: str,
+):
+    """未知的停止原因（可能是失败）"""
+    stop_reason = payload.resolved.stop_reason
+    error = payload.resolved.message or "任务执行失败"
+    logger.warning("[Webhook] 未知的 stop_reason: %s, task_id=%s", stop_reason, task_id)
+    
+    if local_task:
+        await tracker.update(
+            local_task["id"],
+            status="failed",
+            error=error
+        )
+    
+    await manager.send_to_task_subscribers(task_id, {
+        "type": "task_failed",
+        "task_id": task_id,
+        "error": error,
+        "timestamp": timestamp
+    })
+
+
+# 停止原因 -> 处理函数，处理函数参数统一为 (payload, tracker, task_id, local_task, timestamp)
+_STOP_HANDLERS: Dict[Optional[str], Callable[..., Awaitable[None]]] = {
+    "finish": _handle_task_finished,
+    "ask": _handle_task_ask,
+}
+
+
+# 事件类型 -> 处理函数，处理函数参数统一为 (payload, tracker, task_id, timestamp)
+_EVENT_HANDLERS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "task_created": handle_task_created,
+    "task_progress": handle_task_progress,
+    "task_stopped": handle_task_stopped,
+}
+
+
+# 进行中的 PPTX 下载任务（保留引用，避免任务被回收）
+_download_tasks: Set[asyncio.Task] = set()
+
+
+async def _download_pptx_and_notify(
+    tracker,
+    task_id: str,
+    local_task_id: str,
+    task_title: Optional[str],
+):
+    """下载已完成任务的 PPTX，完成或失败后通知前端"""
+    try:
+        ppt_generator = await get_ppt_generator()
+        await ppt_generator.download_completed_task(task_id)
         
-        if local_task:
-            await tracker.update(
-                local_task["id"],
-                status="failed",
-                error=message or "任务执行失败"
-            )
+        # 重新获取更新后的任务信息
+        updated_task = await tracker.get(local_task_id)
         
+        await manager.send_to_task_subscribers(task_id, {
+            "type": "task_completed",
+            "task_id": task_id,
+            "local_task_id": local_task_id,
+            "title": (updated_task.title if updated_task else None) or task_title,
+            "download_url": f"/api/ppt/tasks/{local_task_id}/download",
+            "message": "PPT 生成完成！",
+            "timestamp": _utc_now_iso()
+        })
+        logger.info("[Webhook] 任务完成通知已发送")
+    except Exception as e:
+        logger.error("[Webhook] 下载 PPTX 失败: %s", e, exc_info=True)
         await manager.send_to_task_subscribers(task_id, {
             "type": "task_failed",
             "task_id": task_id,
-            "error": message or "任务执行失败",
-            "timestamp": datetime.now().isoformat()
+            "error": f"下载失败: {str(e)}",
+            "timestamp": _utc_now_iso()
         })
 
 
@@ -420,6 +633,7 @@ async def handle_video_task_stopped(
     local_task: Optional[Dict[str, Any]],
     task_step: Optional[str],
     task_id: str,
+    timestamp: str,
 ):
     """
     处理视频生成任务停止事件
@@ -430,151 +644,145 @@ async def handle_video_task_stopped(
         local_task: 本地任务信息
         task_step: 当前步骤（script_generation / video_generation）
         task_id: Manus 任务 ID
+        timestamp: 事件时间戳（推送消息共用）
     """
-    logger.info(f"[Webhook] 处理视频生成任务停止: task_id={task_id}, step={task_step}")
+    logger.info("[Webhook] 处理视频生成任务停止: task_id=%s, step=%s", task_id, task_step)
     
     if not local_task:
-        logger.warning(f"[Webhook] 视频任务完成但未找到本地任务: task_id={task_id}")
+        logger.warning("[Webhook] 视频任务完成但未找到本地任务: task_id=%s", task_id)
         return
     
     local_task_id = local_task["id"]
+    # 查找结果中已有任务元数据，视频生成服务无需再次读取任务
+    metadata = local_task.get("metadata") or {}
     
     try:
-        # 获取 Manus 客户端和视频生成服务
-        from app.dependencies import get_manus_client
-        async for client in get_manus_client():
-            video_service = VideoGenerationService(client, tracker)
+        # 视频生成服务为全局单例，不再每个事件重新创建
+        video_service = await get_video_service()
+        
+        if task_step == "script_generation":
+            # 脚本生成完成，触发视频生成
+            logger.info("[Webhook] 脚本生成完成，触发视频生成: local_task_id=%s, script_task_id=%s", local_task_id, task_id)
             
-            if task_step == "script_generation":
-                # 脚本生成完成，触发视频生成
-                logger.info(f"[Webhook] 脚本生成完成，触发视频生成: local_task_id={local_task_id}, script_task_id={task_id}")
+            try:
+                result = await video_service.handle_script_generation_complete(
+                    local_task_id=local_task_id,
+                    script_task_id=task_id,
+                    metadata=metadata,
+                )
                 
-                try:
-                    result = await video_service.handle_script_generation_complete(
-                        local_task_id=local_task_id,
-                        script_task_id=task_id,
-                    )
-                    
-                    video_task_id = result.get("video_task_id")
-                    
-                    # 发送脚本生成完成通知
-                    # 同时发送给 script_task_id 和 local_task_id 的订阅者
-                    script_completed_msg = {
-                        "type": "script_generation_completed",
-                        "task_id": task_id,
-                        "local_task_id": local_task_id,
-                        "video_task_id": video_task_id,
-                        "message": "脚本生成完成，开始生成视频",
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    await manager.send_to_task_subscribers(task_id, script_completed_msg)
-                    await manager.send_to_task_subscribers(local_task_id, script_completed_msg)
-                    
-                    # 同时订阅视频生成任务
-                    if video_task_id:
-                        video_started_msg = {
-                            "type": "video_generation_started",
-                            "task_id": video_task_id,
-                            "local_task_id": local_task_id,
-                            "message": "视频生成任务已创建",
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        await manager.send_to_task_subscribers(video_task_id, video_started_msg)
-                        await manager.send_to_task_subscribers(local_task_id, video_started_msg)
-                    
-                    logger.info(f"[Webhook] 视频生成任务已创建: video_task_id={video_task_id}")
-                    
-                except Exception as e:
-                    logger.error(f"[Webhook] 触发视频生成失败: {e}", exc_info=True)
-                    await manager.send_to_task_subscribers(task_id, {
-                        "type": "script_generation_failed",
-                        "task_id": task_id,
-                        "local_task_id": local_task_id,
-                        "error": f"触发视频生成失败: {str(e)}",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    # 更新任务状态为失败
-                    await tracker.update(
-                        local_task_id,
-                        status="failed",
-                        error=f"触发视频生成失败: {str(e)}"
-                    )
-            
-            elif task_step == "video_generation":
-                # 视频生成完成，下载视频
-                logger.info(f"[Webhook] 视频生成完成，开始下载: local_task_id={local_task_id}, video_task_id={task_id}")
+                video_task_id = result.get("video_task_id")
+                
+                # 发送脚本生成完成通知
+                # 同时发送给 script_task_id 和 local_task_id 的订阅者（同一客户端只发送一次）
+                script_completed_msg = {
+                    "type": "script_generation_completed",
+                    "task_id": task_id,
+                    "local_task_id": local_task_id,
+                    "video_task_id": video_task_id,
+                    "message": "脚本生成完成，开始生成视频",
+                    "timestamp": timestamp
+                }
+                await manager.send_to_tasks_subscribers((task_id, local_task_id), script_completed_msg)
                 
-                try:
-                    result = await video_service.handle_video_generation_complete(
-                        local_task_id=local_task_id,
-                        video_task_id=task_id,
-                    )
-                    
-                    video_path = result.get("video_path")
-                    
-                    # 更新任务状态为完成
-                    await tracker.update(
-                        local_task_id,
-                        status="completed"
-                    )
-                    
-                    # 发送视频生成完成通知
-                    # 同时发送给 video_task_id 和 local_task_id 的订阅者
-                    message = {
-                        "type": "video_generation_completed",
-                        "task_id": task_id,
+                # 同时订阅视频生成任务
+                if video_task_id:
+                    video_started_msg = {
+                        "type": "video_generation_started",
+                        "task_id": video_task_id,
                         "local_task_id": local_task_id,
-                        "video_path": video_path,
-                        "download_url": f"/api/video/tasks/{local_task_id}/download",
-                        "message": "视频生成完成！",
-                        "timestamp": datetime.now().isoformat()
+                        "message": "视频生成任务已创建",
+                        "timestamp": timestamp
                     }
-                    # 发送给 video_task_id 的订阅者
-                    await manager.send_to_task_subscribers(task_id, message)
-                    # 同时发送给 local_task_id 的订阅者（前端可能订阅的是 local_task_id）
-                    await manager.send_to_task_subscribers(local_task_id, message)
-                    
-                    logger.info(f"[Webhook] 视频生成完成通知已发送: video_path={video_path}")
-                    
-                except Exception as e:
-                    logger.error(f"[Webhook] 下载视频失败: {e}", exc_info=True)
-                    await manager.send_to_task_subscribers(task_id, {
-                        "type": "video_generation_failed",
-                        "task_id": task_id,
-                        "local_task_id": local_task_id,
-                        "error": f"下载视频失败: {str(e)}",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    # 更新任务状态为失败
-                    await tracker.update(
-                        local_task_id,
-                        status="failed",
-                        error=f"下载视频失败: {str(e)}"
-                    )
-            else:
-                logger.warning(f"[Webhook] 未知的视频任务步骤: step={task_step}, task_id={task_id}")
+                    await manager.send_to_tasks_subscribers((video_task_id, local_task_id), video_started_msg)
+                
+                logger.info("[Webhook] 视频生成任务已创建: video_task_id=%s", video_task_id)
+                
+            except Exception as e:
+                logger.error("[Webhook] 触发视频生成失败: %s", e, exc_info=True)
+                await manager.send_to_task_subscribers(task_id, {
+                    "type": "script_generation_failed",
+                    "task_id": task_id,
+                    "local_task_id": local_task_id,
+                    "error": f"触发视频生成失败: {str(e)}",
+                    "timestamp": timestamp
+                })
+                # 更新任务状态为失败
+                await tracker.update(
+                    local_task_id,
+                    status="failed",
+                    error=f"触发视频生成失败: {str(e)}"
+                )
+        
+        elif task_step == "video_generation":
+            # 视频生成完成，下载视频
+            logger.info("[Webhook] 视频生成完成，开始下载: local_task_id=%s, video_task_id=%s", local_task_id, task_id)
             
-            break  # 只使用第一个客户端实例
+            try:
+                result = await video_service.handle_video_generation_complete(
+                    local_task_id=local_task_id,
+                    video_task_id=task_id,
+                    metadata=metadata,
+                )
+                
+                video_path = result.get("video_path")
+                
+                # 更新任务状态为完成
+                await tracker.update(
+                    local_task_id,
+                    status="completed"
+                )
+                
+                # 发送视频生成完成通知
+                # 同时发送给 video_task_id 和 local_task_id 的订阅者（前端可能订阅的是 local_task_id），
+                # 同一客户端只发送一次
+                message = {
+                    "type": "video_generation_completed",
+                    "task_id": task_id,
+                    "local_task_id": local_task_id,
+                    "video_path": video_path,
+                    "download_url": f"/api/video/tasks/{local_task_id}/download",
+                    "message": "视频生成完成！",
+                    "timestamp": timestamp
+                }
+                await manager.send_to_tasks_subscribers((task_id, local_task_id), message)
+                
+                logger.info("[Webhook] 视频生成完成通知已发送: video_path=%s", video_path)
+                
+            except Exception as e:
+                logger.error("[Webhook] 下载视频失败: %s", e, exc_info=True)
+                await manager.send_to_task_subscribers(task_id, {
+                    "type": "video_generation_failed",
+                    "task_id": task_id,
+                    "local_task_id": local_task_id,
+                    "error": f"下载视频失败: {str(e)}",
+                    "timestamp": timestamp
+                })
+                # 更新任务状态为失败
+                await tracker.update(
+                    local_task_id,
+                    status="failed",
+                    error=f"下载视频失败: {str(e)}"
+                )
+        else:
+            logger.warning("[Webhook] 未知的视频任务步骤: step=%s, task_id=%s", task_step, task_id)
             
     except Exception as e:
-        logger.error(f"[Webhook] 处理视频任务停止失败: {e}", exc_info=True)
+        logger.error("[Webhook] 处理视频任务停止失败: %s", e, exc_info=True)
         await manager.send_to_task_subscribers(task_id, {
             "type": "task_failed",
             "task_id": task_id,
             "local_task_id": local_task_id,
             "error": f"处理失败: {str(e)}",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp
         })
 
 
 # ========== 辅助端点 ==========
 
 @router.get("/status")
-async def webhook_status():
+async def webhook_status(settings: Settings = Depends(get_settings_dep)):
     """检查 Webhook 端点状态"""
-    from app.config import get_settings
-    settings = get_settings()
-    
     webhook_url = ""
     if settings.webhook_base_url:
         webhook_url = settings.webhook_callback_url()
@@ -588,14 +796,16 @@ async def webhook_status():
 
 
 @router.get("/events/{task_id}")
-async def get_task_webhook_events(task_id: str):
+async def get_task_webhook_events(
+    task_id: str,
+    tracker: TaskTrackerService = Depends(get_task_tracker_dep),
+):
     """
     获取任务的所有 Webhook 事件列表
     
     Args:
         task_id: 任务 ID（本地或 Manus）
     """
-    tracker = get_task_tracker()
     events = await tracker.get_webhook_events(task_id)
     
     return {
@@ -8,7 +8,6 @@ WebSocket API 端点
 - 接收实时任务更新
 """
 
-import asyncio
 import json
 import logging
 from datetime import datetime
@@ -58,43 +57,20 @@ async def websocket_endpoint(
         return
     
     try:
-        # 启动心跳检测任务
-        heartbeat_task = asyncio.create_task(
-            _heartbeat_checker(client_id, websocket)
-        )
-        
-        # 监听客户端消息
+        # 监听客户端消息（连接存活由 uvicorn 在协议层 ping/pong 检测，见 run.py 的 ws_ping_interval）
         while True:
-            try:
-                # 接收消息（带超时，用于检测连接状态）
-                data = await asyncio.wait_for(
-                    websocket.receive_text(),
-                    timeout=60.0  # 60秒超时
-                )
-                
-                # 解析并处理消息
-                await _handle_client_message(client_id, data)
-                
-            except asyncio.TimeoutError:
-                # 超时，发送心跳检测
-                try:
-                    await manager.send_to_client(client_id, {
-                        "type": "ping",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                except Exception:
-                    break
+            data = await websocket.receive_text()
+            
+            # 解析并处理消息
+            await _handle_client_message(client_id, data)
                     
     except WebSocketDisconnect:
-        logger.info(f"WebSocket 客户端断开: client_id={client_id}")
+        logger.info("WebSocket 客户端断开: client_id=%s", client_id)
     except Exception as e:
-        logger.error(f"WebSocket 错误: client_id={client_id}, error={e}")
+        logger.error("WebSocket 错误: client_id=%s, error=%s", client_id, e)
     finally:
-        # 取消心跳任务
-        if 'heartbeat_task' in locals():
-            heartbeat_task.cancel()
         # 清理连接
-        await manager.disconnect(client_id)
+        await manager.disconnect(client_id, websocket)
 
 
 async def _handle_client_message(client_id: str, raw_data: str):
@@ -146,7 +122,7 @@ async def _handle_client_message(client_id: str, raw_data: str):
         
     elif action == "pong":
         # 前端对 ping 的响应，静默接受即可
-        logger.debug(f"收到心跳响应: client_id={client_id}")
+        logger.debug("收到心跳响应: client_id=%s", client_id)
         
     elif action == "stats":
         # 获取连接统计（调试用）
@@ -165,26 +141,6 @@ async def _handle_client_message(client_id: str, raw_data: str):
         })
 
 
-async def _heartbeat_checker(client_id: str, websocket: WebSocket):
-    """
-    心跳检测任务
-    
-    定期检查连接是否存活
-    """
-    while True:
-        try:
-            await asyncio.sleep(30)  # 每30秒检测一次
-            
-            if not manager.is_connected(client_id):
-                break
-                
-        except asyncio.CancelledError:
-            break
-        except Exception as e:
-            logger.error(f"心跳检测错误: client_id={client_id}, error={e}")
-            break
-
-
 # === 辅助 API 端点 ===
 
 @router.get("/ws/stats", tags=["WebSocket"])
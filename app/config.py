@@ -3,9 +3,9 @@ Application Configuration - 应用配置管理
 """
 
 import os
-from typing import List
+from typing import FrozenSet, List
 from pathlib import Path
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -18,15 +18,31 @@ class Settings(BaseSettings):
     manus_api_base_url: str = Field(
         default="https://api.manus.ai", env="MANUS_API_BASE_URL"
     )
+    # Manus API 连接池配置（全局共享一个 HTTP 客户端）
+    manus_max_connections: int = Field(default=100, env="MANUS_MAX_CONNECTIONS")
+    manus_max_keepalive: int = Field(default=20, env="MANUS_MAX_KEEPALIVE")
+    manus_http2: bool = Field(default=False, env="MANUS_HTTP2")
 
     # 轮询配置
     poll_interval: int = Field(default=5, env="POLL_INTERVAL")
     poll_timeout: int = Field(default=600, env="POLL_TIMEOUT")
+    # 状态未变化时轮询间隔按 poll_backoff 倍数增长，最长 poll_max_interval 秒；状态变化时重置
+    poll_max_interval: int = Field(default=30, env="POLL_MAX_INTERVAL")
+    poll_backoff: float = Field(default=1.5, env="POLL_BACKOFF")
+
+    # 生成队列配置（worker 数量即最大并发生成数，排队数超过上限时拒绝新任务）
+    generation_workers: int = Field(default=4, env="GENERATION_WORKERS")
+    generation_max_queue: int = Field(default=100, env="GENERATION_MAX_QUEUE")
+    # 同步 IO（文件读写、stat 等）使用的线程池大小
+    thread_pool_size: int = Field(default=40, env="THREAD_POOL_SIZE")
 
     # Webhook 配置
     webhook_enabled: bool = Field(default=False, env="WEBHOOK_ENABLED")
     webhook_base_url: str = Field(default="", env="WEBHOOK_BASE_URL")
     webhook_path: str = Field(default="/webhook/manus", env="WEBHOOK_PATH")
+    # Webhook 事件处理队列（同一任务的事件由同一 worker 按顺序处理）
+    webhook_workers: int = Field(default=4, env="WEBHOOK_WORKERS")
+    webhook_max_queue: int = Field(default=1000, env="WEBHOOK_MAX_QUEUE")
     # 应用对外基础路径（用于反向代理或子路径部署，如 /manus）
     # 重要：该值会影响 webhook 对外回调地址的拼接
     app_base_path: str = Field(default="/manus", env="APP_BASE_PATH")
@@ -84,13 +100,25 @@ class Settings(BaseSettings):
         case_sensitive=False,
     )
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # 确保目录存在
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.tasks_file.parent.mkdir(parents=True, exist_ok=True)
-        self.video_storage_dir.mkdir(parents=True, exist_ok=True)
-        self.markdown_storage_dir.mkdir(parents=True, exist_ok=True)
+    def ensure_dirs(self) -> None:
+        """确保存储目录存在（应用启动时调用一次，创建配置对象本身没有副作用）"""
+        for path in (
+            self.output_dir,
+            self.tasks_file.parent,
+            self.video_storage_dir,
+            self.markdown_storage_dir,
+        ):
+            path.mkdir(parents=True, exist_ok=True)
+
+    @cached_property
+    def video_supported_styles_set(self) -> FrozenSet[str]:
+        """支持的视频风格集合（创建任务时校验用，只构建一次）"""
+        return frozenset(self.video_supported_styles)
+
+    @cached_property
+    def video_supported_audiences_set(self) -> FrozenSet[str]:
+        """支持的目标受众集合（创建任务时校验用，只构建一次）"""
+        return frozenset(self.video_supported_audiences)
 
     def normalized_app_base_path(self) -> str:
         """
@@ -2,16 +2,17 @@
 Dependency Injection - 依赖注入
 """
 
-from typing import AsyncGenerator, Optional
+from typing import Optional
 from functools import lru_cache
 
 from .config import Settings, get_settings
 from .manus_client import AsyncManusClient, AsyncTaskManager, AsyncFileManager
-from .services import TaskTrackerService, PPTGeneratorService
+from .services import TaskTrackerService, PPTGeneratorService, GenerationQueue
+from .services.video import VideoGenerationService
 
 
 async def get_settings_dep() -> Settings:
-    """获取配置依赖"""
+    """获取配置依赖（异步函数，FastAPI 直接调用，不经过线程池）"""
     return get_settings()
 
 
@@ -19,40 +20,42 @@ async def get_settings_dep() -> Settings:
 _manus_client: Optional[AsyncManusClient] = None
 _task_tracker: Optional[TaskTrackerService] = None
 _ppt_generator: Optional[PPTGeneratorService] = None
+_video_service: Optional[VideoGenerationService] = None
+_generation_queue: Optional[GenerationQueue] = None
 
 
-async def get_manus_client() -> AsyncGenerator[AsyncManusClient, None]:
+def get_shared_manus_client() -> AsyncManusClient:
     """
-    获取 Manus 客户端依赖
+    获取全局共享的 Manus 客户端
 
-    使用全局单例，避免每次请求创建新连接
+    所有请求和启动/关闭流程共用同一个连接池，应用关闭时由 cleanup_manus_client 关闭
     """
     global _manus_client
 
     if _manus_client is None:
         _manus_client = AsyncManusClient()
 
-    yield _manus_client
+    return _manus_client
+
+
+async def get_manus_client() -> AsyncManusClient:
+    """
+    获取 Manus 客户端依赖
+
+    使用全局单例，避免每次请求创建新连接；
+    客户端由应用关闭时统一清理，无需 yield 依赖的退出处理
+    """
+    return get_shared_manus_client()
 
 
 async def get_task_manager() -> AsyncTaskManager:
     """获取任务管理器依赖"""
-    global _manus_client
-    
-    if _manus_client is None:
-        _manus_client = AsyncManusClient()
-
-    return AsyncTaskManager(_manus_client)
+    return AsyncTaskManager(get_shared_manus_client())
 
 
 async def get_file_manager() -> AsyncFileManager:
     """获取文件管理器依赖"""
-    global _manus_client
-    
-    if _manus_client is None:
-        _manus_client = AsyncManusClient()
-
-    return AsyncFileManager(_manus_client)
+    return AsyncFileManager(get_shared_manus_client())
 
 
 def get_task_tracker() -> TaskTrackerService:
@@ -65,28 +68,74 @@ def get_task_tracker() -> TaskTrackerService:
     return _task_tracker
 
 
+async def get_task_tracker_dep() -> TaskTrackerService:
+    """获取任务追踪服务依赖（异步函数，FastAPI 直接调用，不经过线程池）"""
+    return get_task_tracker()
+
+
 async def get_ppt_generator() -> PPTGeneratorService:
     """获取 PPT 生成服务依赖"""
-    global _ppt_generator, _manus_client, _task_tracker
-
-    if _manus_client is None:
-        _manus_client = AsyncManusClient()
+    global _ppt_generator, _task_tracker
 
     if _task_tracker is None:
         _task_tracker = TaskTrackerService()
 
     if _ppt_generator is None:
         _ppt_generator = PPTGeneratorService(
-            client=_manus_client,
+            client=get_shared_manus_client(),
             tracker=_task_tracker,
         )
 
     return _ppt_generator
 
 
+async def get_video_service() -> VideoGenerationService:
+    """获取视频生成服务依赖"""
+    global _video_service
+
+    if _video_service is None:
+        _video_service = VideoGenerationService(
+            client=get_shared_manus_client(),
+            tracker=get_task_tracker(),
+        )
+
+    return _video_service
+
+
+async def _run_generation(local_task_id: str) -> None:
+    """生成队列的任务处理函数（执行时再获取生成服务，启动时无需 API Key）"""
+    generator = await get_ppt_generator()
+    await generator.generate_ppt(local_task_id)
+
+
+async def get_generation_queue() -> GenerationQueue:
+    """获取 PPT 生成队列依赖（worker 在应用启动时启动）"""
+    global _generation_queue
+
+    if _generation_queue is None:
+        settings = get_settings()
+        _generation_queue = GenerationQueue(
+            handler=_run_generation,
+            workers=settings.generation_workers,
+            max_queue=settings.generation_max_queue,
+        )
+
+    return _generation_queue
+
+
+async def cleanup_generation_queue() -> None:
+    """停止 PPT 生成队列"""
+    global _generation_queue
+    if _generation_queue:
+        await _generation_queue.stop()
+        _generation_queue = None
+
+
 async def cleanup_manus_client() -> None:
     """清理 Manus 客户端连接"""
-    global _manus_client
+    global _manus_client, _video_service
     if _manus_client:
         await _manus_client.close()
         _manus_client = None
+    # 视频生成服务持有客户端引用，随客户端一起重建
+    _video_service = None
@@ -7,17 +7,26 @@ from contextlib import asynccontextmanager
 
 from pathlib import Path
 
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, RedirectResponse
 
 from .config import get_settings
+from .responses import ORJSONResponse
 from .api.router import api_router
 from .api.websocket import router as websocket_router
-from .api.webhook import router as webhook_router
+from .api.webhook import router as webhook_router, start_webhook_queue, stop_webhook_queue
+from .api.test import cancel_replay_tasks
 from .exceptions import setup_exception_handlers
-from .dependencies import cleanup_manus_client, get_manus_client
+from .dependencies import (
+    cleanup_manus_client,
+    get_shared_manus_client,
+    cleanup_generation_queue,
+    get_generation_queue,
+    get_manus_client,
+)
 from .manus_client import register_webhook_on_startup, unregister_webhook_on_shutdown
 
 # 配置日志
@@ -37,16 +46,28 @@ async def lifespan(app: FastAPI):
     logger.info(f"Debug mode: {settings.debug}")
     logger.info(f"Output directory: {settings.output_dir}")
     
+    # 创建存储目录
+    settings.ensure_dirs()
+    
     if not settings.manus_api_key:
         logger.warning("MANUS_API_KEY not configured!")
     
+    # 限制同步 IO 线程池大小
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+    
+    # 启动 PPT 生成队列
+    generation_queue = await get_generation_queue()
+    await generation_queue.start()
+    
+    # 启动 Webhook 事件处理队列
+    await start_webhook_queue()
+    
     # 如果启用了 Webhook，自动注册
     manus_client = None
     if settings.webhook_enabled:
         logger.info("Webhook 已启用，准备注册...")
         if settings.webhook_base_url:
-            from .manus_client import AsyncManusClient
-            manus_client = AsyncManusClient()
+            manus_client = get_shared_manus_client()
             webhook_id = await register_webhook_on_startup(manus_client)
             if webhook_id is not None:
                 # webhook_id 可能为空字符串（表示已存在但无法获取 id）或实际的 webhook_id
@@ -64,10 +85,13 @@ async def lifespan(app: FastAPI):
     # 关闭时
     logger.info("Shutting down Manus PPT Generator API...")
     
+    await cleanup_generation_queue()
+    await stop_webhook_queue()
+    await cancel_replay_tasks()
+    
     # 注销 Webhook
     if manus_client and settings.webhook_enabled:
         await unregister_webhook_on_shutdown(manus_client)
-        await manus_client.close()
     
     await cleanup_manus_client()
     logger.info("Cleaned up Manus client connection")
@@ -81,6 +105,8 @@ manus_app = FastAPI(
     lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc",
+    # 所有路由默认使用 orjson 序列化响应
+    default_response_class=ORJSONResponse,
 )
 
 # 配置 CORS
@@ -217,6 +243,9 @@ root_app = FastAPI(
     version="0.2.0",
     docs_url=None,
     redoc_url=None,
+    default_response_class=ORJSONResponse,
+    # 挂载的子应用不会触发自身的 lifespan，由对外入口的根应用执行
+    lifespan=lifespan,
 )
 
 # 为根应用添加异常处理器（webhook 路由可能需要）
@@ -3,7 +3,7 @@ Async Manus API Client Module
 """
 
 from .client import AsyncManusClient
-from .tasks import AsyncTaskManager
+from .tasks import AsyncTaskManager, iter_output_files
 from .files import AsyncFileManager
 from .webhooks import (
     AsyncWebhookManager,
@@ -15,6 +15,7 @@ from .webhooks import (
 __all__ = [
     "AsyncManusClient",
     "AsyncTaskManager",
+    "iter_output_files",
     "AsyncFileManager",
     "AsyncWebhookManager",
     "register_webhook_on_startup",
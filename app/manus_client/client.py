@@ -58,6 +58,13 @@ class AsyncManusClient:
                 base_url=self.base_url,
                 headers=self.headers,
                 timeout=httpx.Timeout(60.0),  # 60 秒超时
+                limits=httpx.Limits(
+                    max_keepalive_connections=self._settings.manus_max_keepalive,
+                    max_connections=self._settings.manus_max_connections,
+                    keepalive_expiry=30,
+                ),
+                # HTTP/2 需要安装 h2（httpx[http2]），多个请求复用同一连接
+                http2=self._settings.manus_http2,
             )
         return self._client
 
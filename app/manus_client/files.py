@@ -3,7 +3,7 @@ Async File Manager - 异步文件管理模块
 """
 
 import logging
-from typing import Optional, Dict, Any, BinaryIO
+from typing import Optional, Dict, Any, BinaryIO, AsyncIterator, Union
 from pathlib import Path
 
 import aiofiles
@@ -63,13 +63,7 @@ class AsyncFileManager:
         # Step 1: 创建文件记录，获取 presigned URL
         create_response = await self._create_file_record(filename)
         file_id = create_response.get("id")
-        presigned_url = create_response.get("presigned_url")
-
-        if not presigned_url:
-            raise FileUploadException(
-                "Failed to get presigned URL",
-                detail="Manus API did not return presigned_url",
-            )
+        presigned_url = self._get_presigned_url(create_response)
 
         # Step 2: 读取文件并上传到 S3
         async with aiofiles.open(file_path, "rb") as f:
@@ -112,13 +106,7 @@ class AsyncFileManager:
         # Step 1: 创建文件记录
         create_response = await self._create_file_record(filename)
         file_id = create_response.get("id")
-        presigned_url = create_response.get("presigned_url")
-
-        if not presigned_url:
-            raise FileUploadException(
-                "Failed to get presigned URL",
-                detail="Manus API did not return presigned_url",
-            )
+        presigned_url = self._get_presigned_url(create_response)
 
         # Step 2: 上传到 S3
         await self._upload_to_s3(content, presigned_url)
@@ -127,15 +115,108 @@ class AsyncFileManager:
 
         return {"file_id": file_id, "filename": filename, "size": file_size}
 
+    async def upload_file_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        size: int,
+    ) -> Dict[str, Any]:
+        """
+        流式上传文件内容到 Manus
+
+        文件内容按块转发到 S3，不在内存中拼接完整文件
+
+        Args:
+            chunks: 文件内容的异步分块迭代器
+            filename: 文件名
+            size: 文件大小（字节），作为上传请求的 Content-Length
+
+        Returns:
+            包含 file_id 的响应
+
+        Raises:
+            FileUploadException: 文件过大或上传失败
+        """
+        if size > MAX_FILE_SIZE:
+            raise FileUploadException(
+                f"File too large: {size} bytes",
+                detail=f"Maximum file size is {MAX_FILE_SIZE} bytes (10MB)",
+            )
+
+        logger.info(f"Uploading file stream: {filename} ({size} bytes)")
+
+        # Step 1: 创建文件记录
+        create_response = await self._create_file_record(filename)
+        file_id = create_response.get("id")
+        presigned_url = self._get_presigned_url(create_response)
+
+        # Step 2: 分块上传到 S3
+        await self._upload_to_s3(chunks, presigned_url, content_length=size)
+
+        logger.info(f"File uploaded successfully: {file_id}")
+
+        return {"file_id": file_id, "filename": filename, "size": size}
+
+    async def create_upload_url(self, filename: str) -> Dict[str, Any]:
+        """
+        创建文件记录并返回预签名上传地址
+
+        由客户端直接 PUT 文件内容到该地址，文件数据不经过本服务
+
+        Args:
+            filename: 文件名
+
+        Returns:
+            包含 file_id 和 upload_url 的响应
+
+        Raises:
+            FileUploadException: 未获取到预签名地址
+        """
+        logger.info(f"Creating upload URL: {filename}")
+
+        create_response = await self._create_file_record(filename)
+
+        return {
+            "file_id": create_response.get("id"),
+            "filename": filename,
+            "upload_url": self._get_presigned_url(create_response),
+        }
+
     async def _create_file_record(self, filename: str) -> Dict[str, Any]:
         """创建文件记录"""
         return await self.client.post("/v1/files", data={"filename": filename})
 
-    async def _upload_to_s3(self, content: bytes, presigned_url: str) -> None:
-        """上传文件内容到 S3"""
+    @staticmethod
+    def _get_presigned_url(create_response: Dict[str, Any]) -> str:
+        """从文件记录中取出预签名上传地址"""
+        presigned_url = create_response.get("presigned_url") or create_response.get("upload_url")
+
+        if not presigned_url:
+            raise FileUploadException(
+                "Failed to get presigned URL",
+                detail="Manus API did not return presigned_url",
+            )
+        return presigned_url
+
+    async def _upload_to_s3(
+        self,
+        content: Union[bytes, AsyncIterator[bytes]],
+        presigned_url: str,
+        content_length: Optional[int] = None,
+    ) -> None:
+        """
+        上传文件内容到 S3
+
+        content 为异步迭代器时需要传入 content_length，
+        S3 presigned PUT 不接受 chunked 传输编码
+        """
+        headers = None
+        if content_length is not None:
+            headers = {"Content-Length": str(content_length)}
+
         try:
             async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
-                response = await client.put(presigned_url, content=content)
+                response = await client.put(presigned_url, content=content, headers=headers)
                 response.raise_for_status()
         except httpx.HTTPError as e:
             raise FileUploadException(
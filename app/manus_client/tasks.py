@@ -4,7 +4,7 @@ Async Task Manager - 异步任务管理模块
 
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 
 from .client import AsyncManusClient
 from ..config import Settings, get_settings
@@ -20,6 +20,36 @@ class TaskStatus:
     FAILED = "failed"
 
 
+def iter_output_files(
+    output_messages: Iterable[Dict[str, Any]],
+) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    遍历任务输出中的文件
+
+    非 message 类型的消息在外层直接跳过，只对 output_file 内容读取字段
+
+    Args:
+        output_messages: Manus 任务的 output 列表
+
+    Yields:
+        (file_url, file_name, mime_type)，只输出有下载链接的文件
+    """
+    for message in output_messages:
+        if message.get("type") != "message":
+            continue
+        for content in message.get("content", ()):
+            if content.get("type") != "output_file":
+                continue
+            get = content.get
+            file_url = get("fileUrl") or get("file_url")
+            if file_url:
+                yield (
+                    file_url,
+                    get("fileName") or get("file_name"),
+                    get("mimeType") or get("mime_type"),
+                )
+
+
 class AsyncTaskManager:
     """异步 Manus 任务管理器"""
 
@@ -145,9 +175,12 @@ class AsyncTaskManager:
         """
         异步轮询等待任务完成
 
+        轮询间隔自适应：状态未变化时按 poll_backoff 倍数增长（上限 poll_max_interval），
+        状态变化时重置为 poll_interval
+
         Args:
             task_id: 任务 ID
-            poll_interval: 轮询间隔（秒），默认从配置读取
+            poll_interval: 初始轮询间隔（秒），默认从配置读取
             timeout: 超时时间（秒），默认从配置读取
             convert: 完成后是否转换 pptx 格式（默认 True）
             on_status_change: 状态变化回调函数
@@ -161,6 +194,8 @@ class AsyncTaskManager:
         """
         poll_interval = poll_interval or self._settings.poll_interval
         timeout = timeout or self._settings.poll_timeout
+        max_interval = max(poll_interval, self._settings.poll_max_interval)
+        interval = poll_interval
 
         logger.info(f"Waiting for task {task_id} to complete...")
 
@@ -186,6 +221,9 @@ class AsyncTaskManager:
                     except Exception as e:
                         logger.warning(f"Status change callback error: {e}")
                 last_status = status
+                interval = poll_interval
+            else:
+                interval = min(max_interval, interval * self._settings.poll_backoff)
 
             if status == TaskStatus.COMPLETED:
                 logger.info(f"Task {task_id} completed successfully")
@@ -198,7 +236,8 @@ class AsyncTaskManager:
                 error_msg = task.get("error", "Unknown error")
                 raise RuntimeError(f"Task {task_id} failed: {error_msg}")
 
-            await asyncio.sleep(poll_interval)
+            # 不超过剩余时间，避免超时判断被推迟
+            await asyncio.sleep(min(interval, max(timeout - elapsed, 0)))
 
     async def get_task_progress(self, task_id: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,21 @@
+"""
+Responses - 自定义响应类
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import FileResponse, JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应（C 实现，原生支持 datetime）"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class LargeFileResponse(FileResponse):
+    """大文件响应：每次读取 1MB（默认 64KB），减少视频等大文件传输时的读取和发送次数"""
+
+    chunk_size = 1024 * 1024
@@ -16,7 +16,9 @@ from .task import (
     CreateTaskResponse,
 )
 from .file import (
+    FileUploadRequest,
     FileUploadResponse,
+    FileUploadUrlResponse,
     FileListResponse,
     FileResponse,
     FileDeleteResponse,
@@ -39,7 +41,9 @@ __all__ = [
     "TaskStatus",
     "LocalTaskStatus",
     # File
+    "FileUploadRequest",
     "FileUploadResponse",
+    "FileUploadUrlResponse",
     "FileListResponse",
     "FileResponse",
     "FileDeleteResponse",
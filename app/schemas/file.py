@@ -2,7 +2,7 @@
 File Schemas - 文件数据模型
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -34,6 +34,16 @@ class FileUploadResponse(BaseModel):
     message: str = Field(default="File uploaded successfully", description="响应消息")
 
 
+class FileUploadUrlResponse(BaseModel):
+    """预签名上传地址响应（客户端直传）"""
+
+    file_id: str = Field(..., description="文件 ID")
+    filename: str = Field(..., description="文件名")
+    upload_url: str = Field(..., description="预签名上传地址")
+    method: str = Field(default="PUT", description="上传请求方法")
+    headers: Dict[str, str] = Field(default_factory=dict, description="上传时需携带的请求头")
+
+
 class FileListResponse(BaseModel):
     """文件列表响应"""
 
@@ -105,7 +105,7 @@ class TaskListItem(BaseModel):
     """任务列表项"""
 
     id: str = Field(..., description="任务 ID")
-    status: TaskStatus = Field(..., description="任务状态")
+    status: LocalTaskStatus = Field(..., description="任务状态")
     prompt: Optional[str] = Field(default=None, description="任务提示词")
     credit_usage: Optional[int] = Field(default=None, description="消耗的积分")
     metadata: Optional[TaskMetadata] = Field(default=None, description="任务元数据")
@@ -116,15 +116,16 @@ class TaskListResponse(BaseModel):
     """任务列表响应"""
 
     tasks: List[TaskListItem] = Field(default_factory=list, description="任务列表")
-    total: Optional[int] = Field(default=None, description="总数量")
+    total: Optional[int] = Field(default=None, description="总数量（仅在 include_total=true 时返回）")
     has_more: bool = Field(default=False, description="是否有更多")
+    next_cursor: Optional[str] = Field(default=None, description="下一页游标")
 
 
 class TaskProgressResponse(BaseModel):
     """任务进度响应"""
 
     task_id: str = Field(..., description="任务 ID")
-    status: TaskStatus = Field(..., description="任务状态")
+    status: LocalTaskStatus = Field(..., description="任务状态")
     title: Optional[str] = Field(default=None, description="任务标题")
     task_url: Optional[str] = Field(default=None, description="任务在线查看链接")
     message_count: int = Field(default=0, description="处理消息数量")
@@ -2,8 +2,18 @@
 Services Module - 业务服务层
 """
 
-from .task_tracker import TaskTrackerService, LocalTask, WebhookEvent
+from .task_tracker import TaskTrackerService, LocalTask, TaskSummaryRow, WebhookEvent
 from .ppt_generator import PPTGeneratorService
+from .generation_queue import GenerationQueue
+from .webhook_queue import WebhookEventQueue
 
-__all__ = ["TaskTrackerService", "LocalTask", "WebhookEvent", "PPTGeneratorService"]
+__all__ = [
+    "TaskTrackerService",
+    "LocalTask",
+    "TaskSummaryRow",
+    "WebhookEvent",
+    "PPTGeneratorService",
+    "GenerationQueue",
+    "WebhookEventQueue",
+]
 
@@ -0,0 +1,132 @@
+"""
+Generation Queue - PPT 生成任务队列
+
+进程内异步队列 + 固定数量的 worker，替代 BackgroundTasks：
+- 生成任务排队执行，并发数受 worker 数量限制
+- 同一任务 ID 排队或执行中时重复入队会被忽略（幂等）
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+# 任务处理函数类型：接收本地任务 ID
+TaskHandler = Callable[[str], Awaitable[Any]]
+
+
+class GenerationQueue:
+    """PPT 生成任务队列"""
+
+    def __init__(self, handler: TaskHandler, workers: int = 4, max_queue: int = 100):
+        """
+        初始化任务队列
+
+        Args:
+            handler: 任务处理函数
+            workers: worker 数量（即最大并发生成数）
+            max_queue: 最大排队数量
+        """
+        self._handler = handler
+        self._worker_count = max(1, workers)
+        self._max_queue = max_queue
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        # 排队中的任务 ID（dict 保持入队顺序，用于计算排队位置）
+        self._queued: Dict[str, None] = {}
+        # 执行中的任务 ID
+        self._running: Set[str] = set()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """启动 worker"""
+        if self._workers:
+            return
+
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"ppt-generation-worker-{i}")
+            for i in range(self._worker_count)
+        ]
+        logger.info(f"Generation queue started with {self._worker_count} workers")
+
+    async def stop(self) -> None:
+        """停止 worker（排队中的任务不再执行）"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"Generation queue stopped, {len(self._queued)} queued tasks dropped")
+
+    def enqueue(self, task_id: str) -> bool:
+        """
+        任务入队
+
+        Args:
+            task_id: 本地任务 ID
+
+        Returns:
+            是否入队（任务已在排队或执行中时返回 False）
+        """
+        if task_id in self._queued or task_id in self._running:
+            logger.info(f"Task already queued or running, skip: {task_id}")
+            return False
+
+        self._queued[task_id] = None
+        self._queue.put_nowait(task_id)
+        return True
+
+    def get_task_state(self, task_id: str) -> Dict[str, Any]:
+        """
+        获取任务在队列中的状态
+
+        Args:
+            task_id: 本地任务 ID
+
+        Returns:
+            包含 state（queued/running/not_queued）和 position 的字典
+        """
+        position: Optional[int] = None
+        if task_id in self._running:
+            state = "running"
+        elif task_id in self._queued:
+            state = "queued"
+            position = list(self._queued).index(task_id)
+        else:
+            state = "not_queued"
+
+        return {"task_id": task_id, "state": state, "position": position}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列统计信息"""
+        return {
+            "queued": len(self._queued),
+            "running": len(self._running),
+            "workers": len(self._workers),
+            "max_queue": self._max_queue,
+        }
+
+    @property
+    def depth(self) -> int:
+        """排队中的任务数量"""
+        return len(self._queued)
+
+    @property
+    def is_full(self) -> bool:
+        """排队数量是否已达上限"""
+        return len(self._queued) >= self._max_queue
+
+    async def _worker(self, index: int) -> None:
+        """worker 循环：逐个取出任务并执行"""
+        while True:
+            task_id = await self._queue.get()
+            self._queued.pop(task_id, None)
+            self._running.add(task_id)
+            try:
+                await self._handler(task_id)
+            except Exception as e:
+                # handler 内部已记录任务失败状态，这里只防止 worker 退出
+                logger.error(f"Generation worker {index} failed on task {task_id}: {e}")
+            finally:
+                self._running.discard(task_id)
+                self._queue.task_done()
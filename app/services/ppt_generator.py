@@ -4,6 +4,7 @@ PPT Generator Service - PPT 生成服务
 后台任务处理：创建任务、轮询状态、下载结果
 """
 
+import hashlib
 import logging
 from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
 from pathlib import Path
@@ -14,7 +15,7 @@ import aiofiles
 
 from ..schemas import LocalTaskStatus
 from ..config import Settings, get_settings
-from ..manus_client import AsyncManusClient, AsyncTaskManager, AsyncFileManager
+from ..manus_client import AsyncManusClient, AsyncTaskManager, AsyncFileManager, iter_output_files
 from .task_tracker import TaskTrackerService, LocalTask
 
 logger = logging.getLogger(__name__)
@@ -24,6 +25,15 @@ logger = logging.getLogger(__name__)
 StatusCallback = Callable[[str, str, float], Awaitable[None]]
 
 
+def _ensure_pptx_filename(local_task_id: str, pptx_filename: Optional[str]) -> str:
+    """生成最终的下载文件名，确保有 .pptx 扩展名"""
+    if not pptx_filename:
+        return f"ppt_{local_task_id[:8]}.pptx"
+    if not pptx_filename.lower().endswith('.pptx'):
+        return f"{pptx_filename}.pptx"
+    return pptx_filename
+
+
 class PPTGeneratorService:
     """PPT 生成服务"""
 
@@ -124,6 +134,7 @@ class PPTGeneratorService:
             pptx_url, pptx_filename = self._extract_pptx_info(completed_task)
 
             if pptx_url:
+                pptx_filename = _ensure_pptx_filename(local_task_id, pptx_filename)
                 await self.tracker.update(
                     local_task_id,
                     status=LocalTaskStatus.DOWNLOADING.value,
@@ -132,7 +143,7 @@ class PPTGeneratorService:
                     credit_usage=completed_task.get("credit_usage", 0),
                 )
 
-                local_file_path = await self._download_pptx(
+                local_file_path, pptx_etag = await self._download_pptx(
                     local_task_id,
                     pptx_url,
                     pptx_filename,
@@ -143,6 +154,7 @@ class PPTGeneratorService:
                     local_task_id,
                     status=LocalTaskStatus.COMPLETED.value,
                     local_file_path=local_file_path,
+                    pptx_etag=pptx_etag,
                 )
             else:
                 # 没有 PPTX URL，但任务完成
@@ -227,17 +239,9 @@ class PPTGeneratorService:
         Returns:
             (pptx_url, pptx_filename)
         """
-        outputs = task.get("output", [])
-        
-        for output_item in outputs:
-            if output_item.get("type") == "message":
-                for content_item in output_item.get("content", []):
-                    if content_item.get("type") == "output_file":
-                        file_url = content_item.get("fileUrl")
-                        file_name = content_item.get("fileName")
-                        
-                        if file_url and (file_url.endswith(".pptx") or "pptx" in file_url.lower()):
-                            return file_url, file_name
+        for file_url, file_name, _ in iter_output_files(task.get("output", [])):
+            if "pptx" in file_url.lower():
+                return file_url, file_name
 
         return None, None
 
@@ -246,7 +250,7 @@ class PPTGeneratorService:
         local_task_id: str,
         pptx_url: str,
         pptx_filename: Optional[str] = None,
-    ) -> str:
+    ) -> Tuple[str, str]:
         """
         下载 PPTX 文件到本地
 
@@ -256,13 +260,9 @@ class PPTGeneratorService:
             pptx_filename: 文件名
 
         Returns:
-            本地文件路径
+            (本地文件路径, 文件内容哈希)
         """
-        # 生成文件名，确保有 .pptx 扩展名
-        if not pptx_filename:
-            pptx_filename = f"ppt_{local_task_id[:8]}.pptx"
-        elif not pptx_filename.lower().endswith('.pptx'):
-            pptx_filename = f"{pptx_filename}.pptx"
+        pptx_filename = _ensure_pptx_filename(local_task_id, pptx_filename)
 
         # 确保输出目录存在
         output_dir = Path(self._settings.output_dir)
@@ -279,8 +279,11 @@ class PPTGeneratorService:
             async with aiofiles.open(local_path, "wb") as f:
                 await f.write(response.content)
 
+        # 文件完成后不再变化，下载时计算一次内容哈希作为 ETag
+        etag = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+
         logger.info(f"Downloaded PPTX: {local_path} ({len(response.content)} bytes)")
-        return str(local_path)
+        return str(local_path), etag
 
     # ========== Webhook 模式方法 ==========
 
@@ -371,6 +374,8 @@ class PPTGeneratorService:
             )
             return None
 
+        pptx_filename = _ensure_pptx_filename(local_task_id, pptx_filename)
+
         # 更新状态
         await self.tracker.update(
             local_task_id,
@@ -381,7 +386,7 @@ class PPTGeneratorService:
         )
 
         # 下载文件
-        local_file_path = await self._download_pptx(
+        local_file_path, pptx_etag = await self._download_pptx(
             local_task_id,
             pptx_url,
             pptx_filename,
@@ -392,6 +397,7 @@ class PPTGeneratorService:
             local_task_id,
             status=LocalTaskStatus.COMPLETED.value,
             local_file_path=local_file_path,
+            pptx_etag=pptx_etag,
         )
 
         logger.info(f"[Webhook] Task completed and downloaded: {local_file_path}")
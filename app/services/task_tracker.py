@@ -4,16 +4,19 @@ Task Tracker Service - 本地任务追踪服务
 使用 JSON 文件存储任务状态，支持异步 CRUD 操作
 """
 
+import heapq
 import json
 import logging
 import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Callable
 from dataclasses import dataclass, field, asdict
+from operator import itemgetter
 from uuid import uuid4
 
 import aiofiles
+import aiofiles.os
 
 from ..schemas import LocalTaskStatus
 from ..config import get_settings
@@ -50,6 +53,7 @@ class LocalTask:
     pptx_url: Optional[str] = None             # PPTX 下载链接
     pptx_filename: Optional[str] = None        # PPTX 文件名
     local_file_path: Optional[str] = None      # 本地保存路径
+    pptx_etag: Optional[str] = None            # PPTX 内容哈希（下载时计算，用作 ETag）
     
     # 元数据
     title: Optional[str] = None                # 任务标题
@@ -60,19 +64,72 @@ class LocalTask:
     # Webhook 事件列表
     webhook_events: List[Dict[str, Any]] = field(default_factory=list)
     
-    # 时间戳
-    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
-    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
-    completed_at: Optional[str] = None
+    # 时间戳（加载时解析为 datetime，存储时仍为 ISO 字符串）
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典（时间戳转换为 ISO 字符串）"""
+        data = asdict(self)
+        for key in _TIMESTAMP_FIELDS:
+            if data[key]:
+                data[key] = data[key].isoformat()
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "LocalTask":
-        """从字典创建"""
-        return cls(**data)
+        """从字典创建（ISO 字符串时间戳只在这里解析一次）"""
+        task = cls(**data)
+        for key in _TIMESTAMP_FIELDS:
+            value = getattr(task, key)
+            if isinstance(value, str):
+                setattr(task, key, datetime.fromisoformat(value) if value else None)
+        return task
+
+
+# LocalTask 中以 ISO 字符串存储的时间戳字段
+_TIMESTAMP_FIELDS = ("created_at", "updated_at", "completed_at")
+
+
+@dataclass
+class TaskSummaryRow:
+    """任务列表摘要（只包含列表页需要的字段）"""
+
+    __slots__ = ("id", "status", "prompt", "credit_usage", "title", "task_url", "created_at")
+
+    id: str
+    status: str
+    prompt: str
+    credit_usage: int
+    title: Optional[str]
+    task_url: Optional[str]
+    created_at: str                            # 存储中的 ISO 字符串（同时用于分页游标）
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskSummaryRow":
+        """从存储的任务字典中取出摘要字段"""
+        return cls(
+            data["id"],
+            data.get("status", LocalTaskStatus.PENDING.value),
+            data.get("prompt", ""),
+            data.get("credit_usage", 0),
+            data.get("title"),
+            data.get("task_url"),
+            data["created_at"],
+        )
+
+
+# 任务列表排序键：(created_at, id)
+_sort_key = itemgetter("created_at", "id")
+
+
+def _task_from_cache(task_data: Dict[str, Any]) -> LocalTask:
+    """从缓存的任务字典创建任务对象（metadata 复制一份，调用方修改时不影响缓存）"""
+    metadata = task_data.get("metadata")
+    if metadata:
+        task_data = {**task_data, "metadata": dict(metadata)}
+    return LocalTask.from_dict(task_data)
 
 
 class TaskTrackerService:
@@ -93,6 +150,11 @@ class TaskTrackerService:
             self._storage_path = Path(settings.output_dir) / "tasks.json"
         
         self._lock = asyncio.Lock()
+        # 已解析的任务数据及对应的文件版本 (mtime_ns, size)，文件未变化时不重复读取和解析
+        self._tasks_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._tasks_version: Optional[Tuple[int, int]] = None
+        # Manus 任务 ID -> 本地任务 ID 索引，基于缓存的任务数据构建，缓存重新加载时重建
+        self._manus_index: Optional[Dict[str, str]] = None
         self._ensure_storage_dir()
 
         logger.info(f"TaskTrackerService initialized, storage: {self._storage_path}")
@@ -105,31 +167,104 @@ class TaskTrackerService:
         if not self._storage_path.exists():
             self._storage_path.write_text("{}")
 
+    async def _file_version(self) -> Tuple[int, int]:
+        """存储文件的版本 (mtime_ns, size)"""
+        st = await aiofiles.os.stat(self._storage_path)
+        return st.st_mtime_ns, st.st_size
+
     async def _load_tasks(self) -> Dict[str, Dict[str, Any]]:
-        """加载所有任务"""
+        """
+        加载所有任务
+
+        文件未变化时返回缓存的数据（同一个字典，修改后必须调用 _save_tasks）；
+        文件被其他进程或同步方法修改后重新读取
+        """
         try:
+            version = await self._file_version()
+            if self._tasks_cache is not None and version == self._tasks_version:
+                return self._tasks_cache
+
             async with aiofiles.open(self._storage_path, "r", encoding="utf-8") as f:
                 content = await f.read()
-                return json.loads(content) if content else {}
+            tasks = json.loads(content) if content else {}
         except (json.JSONDecodeError, FileNotFoundError):
+            self._tasks_cache = None
+            self._manus_index = None
             return {}
 
+        self._tasks_cache = tasks
+        self._tasks_version = version
+        self._manus_index = None
+        return tasks
+
     async def _save_tasks(self, tasks: Dict[str, Dict[str, Any]]) -> None:
-        """保存所有任务"""
-        async with aiofiles.open(self._storage_path, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(tasks, ensure_ascii=False, indent=2))
+        """
+        保存所有任务（同时更新缓存）
+
+        整个任务文件的序列化在线程中执行，Webhook 事件频繁写入时不阻塞事件循环；
+        调用方持有锁，序列化期间任务数据不会被修改
+        """
+        try:
+            content = await asyncio.to_thread(json.dumps, tasks, ensure_ascii=False, indent=2)
+            async with aiofiles.open(self._storage_path, "w", encoding="utf-8") as f:
+                await f.write(content)
+            self._tasks_version = await self._file_version()
+        except Exception:
+            # 写入失败时缓存可能与文件不一致，下次重新读取
+            self._tasks_cache = None
+            self._manus_index = None
+            raise
+        self._tasks_cache = tasks
+
+    def _find_id_by_manus_task_id(
+        self, tasks: Dict[str, Dict[str, Any]], manus_task_id: str
+    ) -> Optional[str]:
+        """
+        在已加载的任务数据中按 Manus 任务 ID 查找本地任务 ID（需持有锁）
+
+        使用索引查找，不遍历所有任务；索引结果会再与任务数据核对，已删除的任务不会被返回
+        """
+        if tasks is not self._tasks_cache:
+            # 数据未缓存（文件读取失败等），直接遍历
+            for tid, tdata in tasks.items():
+                if tdata.get("manus_task_id") == manus_task_id:
+                    return tid
+            return None
+
+        if self._manus_index is None:
+            index: Dict[str, str] = {}
+            for tid, tdata in tasks.items():
+                mid = tdata.get("manus_task_id")
+                if mid:
+                    # 多个任务使用同一 Manus ID 时保留第一个（与遍历查找结果一致）
+                    index.setdefault(mid, tid)
+            self._manus_index = index
+
+        tid = self._manus_index.get(manus_task_id)
+        task_data = tasks.get(tid) if tid else None
+        if task_data and task_data.get("manus_task_id") == manus_task_id:
+            return tid
+        return None
 
     async def create(
         self,
-        prompt: str,
+        prompt: str = "",
         attachments: Optional[List[Dict[str, str]]] = None,
+        status: str = LocalTaskStatus.PENDING.value,
+        metadata: Optional[Dict[str, Any]] = None,
+        manus_task_id: Optional[str] = None,
     ) -> LocalTask:
         """
         创建新任务
 
+        初始状态和元数据在创建时一并写入，无需创建后再调用 update
+
         Args:
-            prompt: 任务提示词
+            prompt: 任务提示词（视频等参数保存在 metadata 中的任务只作为列表显示的标签）
             attachments: 附件列表
+            status: 初始状态
+            metadata: 扩展元数据
+            manus_task_id: Manus 任务 ID
 
         Returns:
             创建的本地任务
@@ -138,12 +273,17 @@ class TaskTrackerService:
             id=str(uuid4()),
             prompt=prompt,
             attachments=attachments or [],
+            status=status,
+            metadata=metadata,
+            manus_task_id=manus_task_id,
         )
 
         async with self._lock:
             tasks = await self._load_tasks()
             tasks[task.id] = task.to_dict()
             await self._save_tasks(tasks)
+            if manus_task_id and self._manus_index is not None:
+                self._manus_index.setdefault(manus_task_id, task.id)
 
         logger.info(f"Created local task: {task.id}")
         return task
@@ -163,7 +303,7 @@ class TaskTrackerService:
             task_data = tasks.get(task_id)
             
         if task_data:
-            return LocalTask.from_dict(task_data)
+            return _task_from_cache(task_data)
         return None
 
     async def update(
@@ -180,6 +320,8 @@ class TaskTrackerService:
 
         Returns:
             更新后的任务，不存在返回 None
+
+        所有字段与当前值相同时（如 Webhook 重复上报处理中状态）不写入文件，也不更新 updated_at
         """
         async with self._lock:
             tasks = await self._load_tasks()
@@ -188,8 +330,14 @@ class TaskTrackerService:
             if not task_data:
                 return None
             
-            # 更新字段
+            if all(k in task_data and task_data[k] == v for k, v in kwargs.items()):
+                logger.debug(f"Task {task_id} unchanged, skip write: {list(kwargs.keys())}")
+                return _task_from_cache(task_data)
+            
+            # 更新字段（Manus 任务 ID 变化时重建索引）
             task_data.update(kwargs)
+            if "manus_task_id" in kwargs:
+                self._manus_index = None
             task_data["updated_at"] = datetime.utcnow().isoformat()
             
             # 如果状态变为完成，记录完成时间
@@ -200,13 +348,14 @@ class TaskTrackerService:
             await self._save_tasks(tasks)
         
         logger.debug(f"Updated task {task_id}: {list(kwargs.keys())}")
-        return LocalTask.from_dict(task_data)
+        return _task_from_cache(task_data)
 
     async def list(
         self,
         status: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
+        cursor: Optional[Tuple[str, str]] = None,
     ) -> List[LocalTask]:
         """
         获取任务列表
@@ -215,6 +364,7 @@ class TaskTrackerService:
             status: 状态过滤
             limit: 返回数量限制
             offset: 偏移量
+            cursor: 游标 (created_at, id)，只返回排在该任务之后的记录
 
         Returns:
             任务列表
@@ -222,16 +372,66 @@ class TaskTrackerService:
         async with self._lock:
             tasks = await self._load_tasks()
         
-        # 转换为列表并排序（按创建时间倒序）
-        task_list = [LocalTask.from_dict(t) for t in tasks.values()]
-        task_list.sort(key=lambda x: x.created_at, reverse=True)
+        # 直接在原始字典上过滤，只为当前页构造 LocalTask
+        rows = tasks.values()
         
         # 状态过滤
         if status:
-            task_list = [t for t in task_list if t.status == status]
+            rows = (t for t in rows if t.get("status") == status)
+        
+        return self._page(rows, limit, offset, cursor)
+
+    async def list_summary(
+        self,
+        status: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[Tuple[str, str]] = None,
+        with_total: bool = False,
+    ) -> Tuple[List[TaskSummaryRow], Optional[int]]:
+        """
+        获取任务摘要列表（只构造列表页需要的字段）
+
+        Args:
+            status: 状态过滤
+            limit: 返回数量限制
+            offset: 偏移量
+            cursor: 游标 (created_at, id)，只返回排在该任务之后的记录
+            with_total: 是否同时统计符合状态过滤的任务总数（只读取一次存储）
+
+        Returns:
+            (摘要列表, 任务总数)，with_total 为 False 时总数为 None
+        """
+        async with self._lock:
+            tasks = await self._load_tasks()
+        
+        rows = tasks.values()
+        if status:
+            rows = (t for t in rows if t.get("status") == status)
+        
+        total = None
+        if with_total:
+            rows = list(rows)
+            total = len(rows)
+        
+        return self._page(rows, limit, offset, cursor, TaskSummaryRow.from_dict), total
+
+    @staticmethod
+    def _page(
+        rows: Iterable[Dict[str, Any]],
+        limit: int,
+        offset: int,
+        cursor: Optional[Tuple[str, str]],
+        build: Callable[[Dict[str, Any]], Any] = _task_from_cache,
+    ) -> List[Any]:
+        """对原始任务字典做游标过滤和分页，只为当前页调用 build 构造对象"""
+        # 游标过滤
+        if cursor:
+            rows = (t for t in rows if _sort_key(t) < cursor)
         
-        # 分页
-        return task_list[offset : offset + limit]
+        # 按创建时间倒序（id 作为并列时的稳定次序），只取前 offset + limit 条，无需整体排序
+        page = heapq.nlargest(offset + limit, rows, key=_sort_key)[offset:]
+        return [build(t) for t in page]
 
     async def delete(self, task_id: str) -> bool:
         """
@@ -280,15 +480,15 @@ class TaskTrackerService:
             manus_task_id: Manus 任务 ID
 
         Returns:
-            任务字典，不存在返回 None
+            任务字典（副本，调用方修改时不影响缓存），不存在返回 None
         """
         async with self._lock:
             tasks = await self._load_tasks()
-        
-        for task_data in tasks.values():
-            if task_data.get("manus_task_id") == manus_task_id:
-                return task_data
-        return None
+            task_id = self._find_id_by_manus_task_id(tasks, manus_task_id)
+            if not task_id:
+                return None
+            task_data = tasks[task_id]
+            return {**task_data, "metadata": dict(task_data.get("metadata") or {})}
 
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -377,11 +577,10 @@ class TaskTrackerService:
             
             # 再尝试按 Manus ID 查找
             if not task_data:
-                for tid, tdata in tasks.items():
-                    if tdata.get("manus_task_id") == task_id:
-                        task_id = tid
-                        task_data = tdata
-                        break
+                local_id = self._find_id_by_manus_task_id(tasks, task_id)
+                if local_id:
+                    task_id = local_id
+                    task_data = tasks[local_id]
             
             if not task_data:
                 logger.warning(f"添加 Webhook 事件失败: 任务不存在 task_id={task_id}")
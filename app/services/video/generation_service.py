@@ -143,6 +143,7 @@ class VideoGenerationService:
         self,
         local_task_id: str,
         script_task_id: str,
+        metadata: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         处理脚本生成完成（由 Webhook 调用）
@@ -150,6 +151,7 @@ class VideoGenerationService:
         Args:
             local_task_id: 本地任务 ID
             script_task_id: 脚本生成任务 ID
+            metadata: 已读取的任务元数据（可选，传入时不再读取任务）
 
         Returns:
             包含 video_task_id 的字典
@@ -167,12 +169,15 @@ class VideoGenerationService:
             if not self.tracker:
                 raise RuntimeError("TaskTrackerService 未初始化")
 
-            logger.debug(f"[视频生成] 获取本地任务信息: local_task_id={local_task_id}")
-            task = await self.tracker.get(local_task_id)
-            if not task:
-                raise RuntimeError(f"本地任务不存在: {local_task_id}")
-
-            metadata = task.metadata or {}
+            if metadata is None:
+                logger.debug(f"[视频生成] 获取本地任务信息: local_task_id={local_task_id}")
+                task = await self.tracker.get(local_task_id)
+                if not task:
+                    raise RuntimeError(f"本地任务不存在: {local_task_id}")
+                metadata = task.metadata or {}
+            else:
+                # 复制一份，后续修改不影响调用方的数据
+                metadata = dict(metadata)
             duration = metadata.get("duration")
             style = metadata.get("style")
 
@@ -346,6 +351,7 @@ class VideoGenerationService:
         self,
         local_task_id: str,
         video_task_id: str,
+        metadata: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         处理视频生成完成（由 Webhook 调用）
@@ -353,6 +359,7 @@ class VideoGenerationService:
         Args:
             local_task_id: 本地任务 ID
             video_task_id: 视频生成任务 ID
+            metadata: 已读取的任务元数据（可选，传入时不再读取任务）
 
         Returns:
             包含 video_path 的字典
@@ -371,12 +378,15 @@ class VideoGenerationService:
             if not self.tracker:
                 raise RuntimeError("TaskTrackerService 未初始化")
 
-            logger.debug(f"[视频生成] 获取本地任务信息: local_task_id={local_task_id}")
-            task = await self.tracker.get(local_task_id)
-            if not task:
-                raise RuntimeError(f"本地任务不存在: {local_task_id}")
-
-            metadata = task.metadata or {}
+            if metadata is None:
+                logger.debug(f"[视频生成] 获取本地任务信息: local_task_id={local_task_id}")
+                task = await self.tracker.get(local_task_id)
+                if not task:
+                    raise RuntimeError(f"本地任务不存在: {local_task_id}")
+                metadata = task.metadata or {}
+            else:
+                # 复制一份，后续修改不影响调用方的数据
+                metadata = dict(metadata)
             duration = metadata.get("duration")
 
             if not duration:
@@ -0,0 +1,113 @@
+"""
+Webhook Queue - Webhook 事件处理队列
+
+进程内异步队列 + 固定数量的 worker，替代 BackgroundTasks：
+- Webhook 端点只负责入队，立即返回 200
+- 按任务 ID 分配到固定的 worker，同一任务的事件按到达顺序处理
+- 不同任务的事件由不同 worker 并发处理，并发数受 worker 数量限制
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+# 事件处理函数类型：接收 Webhook 事件
+EventHandler = Callable[[Any], Awaitable[Any]]
+
+
+class WebhookEventQueue:
+    """Webhook 事件处理队列"""
+
+    def __init__(self, handler: EventHandler, workers: int = 4, max_queue: int = 1000):
+        """
+        初始化事件队列
+
+        Args:
+            handler: 事件处理函数
+            workers: worker 数量（即最大并发处理数）
+            max_queue: 最大排队数量
+        """
+        self._handler = handler
+        self._worker_count = max(1, workers)
+        self._max_queue = max_queue
+        # 每个 worker 一个队列，同一任务的事件总是进入同一个队列
+        self._queues: List["asyncio.Queue[Any]"] = [
+            asyncio.Queue() for _ in range(self._worker_count)
+        ]
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """启动 worker"""
+        if self._workers:
+            return
+
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"webhook-worker-{i}")
+            for i in range(self._worker_count)
+        ]
+        logger.info(f"Webhook queue started with {self._worker_count} workers")
+
+    async def stop(self) -> None:
+        """停止 worker（排队中的事件不再处理）"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"Webhook queue stopped, {self.depth} queued events dropped")
+
+    def enqueue(self, key: str, event: Any) -> bool:
+        """
+        事件入队
+
+        Args:
+            key: 分配 worker 的键（通常为任务 ID）
+            event: Webhook 事件
+
+        Returns:
+            是否入队（队列未启动或已满时返回 False）
+        """
+        if not self._workers or self.is_full:
+            return False
+
+        index = hash(key) % self._worker_count
+        self._queues[index].put_nowait(event)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列统计信息"""
+        return {
+            "queued": self.depth,
+            "workers": len(self._workers),
+            "max_queue": self._max_queue,
+        }
+
+    @property
+    def depth(self) -> int:
+        """排队中的事件数量"""
+        return sum(q.qsize() for q in self._queues)
+
+    @property
+    def is_running(self) -> bool:
+        """worker 是否已启动"""
+        return bool(self._workers)
+
+    @property
+    def is_full(self) -> bool:
+        """排队数量是否已达上限"""
+        return self.depth >= self._max_queue
+
+    async def _worker(self, index: int) -> None:
+        """worker 循环：按顺序逐个处理所属队列中的事件"""
+        queue = self._queues[index]
+        while True:
+            event = await queue.get()
+            try:
+                await self._handler(event)
+            except Exception as e:
+                # handler 内部已记录处理失败，这里只防止 worker 退出
+                logger.error(f"Webhook worker {index} failed: {e}")
+            finally:
+                queue.task_done()
@@ -9,14 +9,23 @@ WebSocket 连接管理器
 """
 
 import asyncio
-import json
 import logging
 from datetime import datetime
-from typing import Dict, Set, Optional, Any
+from typing import Dict, Iterable, List, Set, Optional, Any
+
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 
 logger = logging.getLogger(__name__)
 
+# 单个客户端发送超时（秒）：并发推送时卡住的客户端会被断开，不会一直占用推送方
+_SEND_TIMEOUT = 10.0
+
+
+def _dumps(message: dict) -> str:
+    """序列化消息为 JSON 文本（前端按文本帧解析）"""
+    return orjson.dumps(message).decode()
+
 
 class ConnectionManager:
     """WebSocket 连接管理器"""
@@ -65,7 +74,7 @@ class ConnectionManager:
                 self._active_connections[client_id] = websocket
                 self._client_tasks[client_id] = set()
             
-            logger.info(f"WebSocket 连接成功: client_id={client_id}, 当前连接数={self.active_count}")
+            logger.info("WebSocket 连接成功: client_id=%s, 当前连接数=%s", client_id, self.active_count)
             
             # 发送连接确认消息
             await self.send_to_client(client_id, {
@@ -78,18 +87,21 @@ class ConnectionManager:
             return True
             
         except Exception as e:
-            logger.error(f"WebSocket 连接失败: client_id={client_id}, error={e}")
+            logger.error("WebSocket 连接失败: client_id=%s, error=%s", client_id, e)
             return False
     
-    async def disconnect(self, client_id: str):
+    async def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
         """
         断开 WebSocket 连接
         
         Args:
             client_id: 客户端唯一标识
+            websocket: 要断开的连接对象；指定时只有当前登记的仍是该连接才移除，
+                避免旧连接的失败把复用同一 client_id 的新连接注销
         """
         async with self._lock:
-            if client_id not in self._active_connections:
+            current = self._active_connections.get(client_id)
+            if current is None or (websocket is not None and current is not websocket):
                 return
             
             # 移除连接
@@ -105,7 +117,7 @@ class ConnectionManager:
                             del self._task_subscriptions[task_id]
                 del self._client_tasks[client_id]
         
-        logger.info(f"WebSocket 断开连接: client_id={client_id}, 当前连接数={self.active_count}")
+        logger.info("WebSocket 断开连接: client_id=%s, 当前连接数=%s", client_id, self.active_count)
     
     async def subscribe_task(self, client_id: str, task_id: str):
         """
@@ -117,7 +129,7 @@ class ConnectionManager:
         """
         async with self._lock:
             if client_id not in self._active_connections:
-                logger.warning(f"订阅失败: client_id={client_id} 未连接")
+                logger.warning("订阅失败: client_id=%s 未连接", client_id)
                 return
             
             # 添加任务订阅
@@ -128,9 +140,71 @@ class ConnectionManager:
             # 记录客户端订阅的任务
             self._client_tasks[client_id].add(task_id)
         
-        logger.debug(f"任务订阅: client_id={client_id}, task_id={task_id}")
+        logger.debug("任务订阅: client_id=%s, task_id=%s", client_id, task_id)
+        
+        # 发送订阅确认
+        await self._send_subscribed(client_id, task_id)
+    
+    async def subscribe_if_connected(self, client_id: Optional[str], task_id: str) -> bool:
+        """
+        客户端已连接时订阅任务更新
+        
+        连接检查与订阅在同一次加锁内完成，避免检查后客户端断开的竞态
+        
+        Args:
+            client_id: 客户端唯一标识（可为空）
+            task_id: 任务 ID
+            
+        Returns:
+            是否订阅成功
+        """
+        if not client_id:
+            return False
+        
+        async with self._lock:
+            if client_id not in self._active_connections:
+                return False
+            
+            self._task_subscriptions.setdefault(task_id, set()).add(client_id)
+            self._client_tasks[client_id].add(task_id)
+        
+        logger.debug("任务订阅: client_id=%s, task_id=%s", client_id, task_id)
+        
+        await self._send_subscribed(client_id, task_id)
+        return True
+    
+    async def subscribe_tasks(self, client_id: str, task_ids: List[str]) -> bool:
+        """
+        批量订阅任务更新（只获取一次锁）
+        
+        Args:
+            client_id: 客户端唯一标识
+            task_ids: 任务 ID 列表
+            
+        Returns:
+            是否订阅成功
+        """
+        async with self._lock:
+            if client_id not in self._active_connections:
+                logger.warning("订阅失败: client_id=%s 未连接", client_id)
+                return False
+            
+            for task_id in task_ids:
+                if task_id not in self._task_subscriptions:
+                    self._task_subscriptions[task_id] = set()
+                self._task_subscriptions[task_id].add(client_id)
+            
+            self._client_tasks[client_id].update(task_ids)
+        
+        logger.debug("任务订阅: client_id=%s, task_ids=%s", client_id, task_ids)
         
         # 发送订阅确认
+        for task_id in task_ids:
+            await self._send_subscribed(client_id, task_id)
+        return True
+    
+    async def _send_subscribed(self, client_id: str, task_id: str):
+        """发送订阅确认"""
         await self.send_to_client(client_id, {
             "type": "subscribed",
             "task_id": task_id,
@@ -155,7 +229,7 @@ class ConnectionManager:
             if client_id in self._client_tasks:
                 self._client_tasks[client_id].discard(task_id)
         
-        logger.debug(f"取消订阅: client_id={client_id}, task_id={task_id}")
+        logger.debug("取消订阅: client_id=%s, task_id=%s", client_id, task_id)
     
     async def send_to_client(self, client_id: str, message: dict) -> bool:
         """
@@ -168,25 +242,48 @@ class ConnectionManager:
         Returns:
             是否发送成功
         """
-        if client_id not in self._active_connections:
-            logger.warning(f"发送失败: client_id={client_id} 未连接")
+        return await self._send_text(client_id, _dumps(message), message.get("type"))
+    
+    async def _send_text(self, client_id: str, text: str, message_type: Optional[str] = None) -> bool:
+        """
+        向指定客户端发送已序列化的 JSON 文本
+        
+        Args:
+            client_id: 客户端唯一标识
+            text: JSON 文本
+            message_type: 消息类型（仅用于日志）
+            
+        Returns:
+            是否发送成功
+        """
+        websocket = self._active_connections.get(client_id)
+        if websocket is None:
+            logger.warning("发送失败: client_id=%s 未连接", client_id)
             return False
         
-        websocket = self._active_connections[client_id]
         try:
-            await websocket.send_json(message)
-            logger.debug(f"消息已发送: client_id={client_id}, type={message.get('type')}")
+            await asyncio.wait_for(websocket.send_text(text), _SEND_TIMEOUT)
+            logger.debug("消息已发送: client_id=%s, type=%s", client_id, message_type)
             return True
+        except asyncio.TimeoutError:
+            logger.error("发送消息超时: client_id=%s, timeout=%ss", client_id, _SEND_TIMEOUT)
         except Exception as e:
-            logger.error(f"发送消息失败: client_id={client_id}, error={e}")
-            # 发送失败，可能连接已断开，清理
-            await self.disconnect(client_id)
-            return False
+            logger.error("发送消息失败: client_id=%s, error=%s", client_id, e)
+        
+        # 发送失败或超时：关闭连接（可能已写出半个帧），再清理登记
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+        await self.disconnect(client_id, websocket)
+        return False
     
     async def send_to_task_subscribers(self, task_id: str, message: dict) -> int:
         """
         向所有订阅指定任务的客户端发送消息
         
+        消息只序列化一次，并发发送给各客户端
+        
         Args:
             task_id: 任务 ID
             message: 消息内容（字典）
@@ -195,39 +292,94 @@ class ConnectionManager:
             成功发送的客户端数量
         """
         if task_id not in self._task_subscriptions:
-            logger.debug(f"任务无订阅者: task_id={task_id}")
+            logger.debug("任务无订阅者: task_id=%s", task_id)
             return 0
         
-        # 复制订阅者列表，避免迭代时修改
+        # 复制订阅者列表，避免发送过程中断开连接时修改集合
         subscribers = list(self._task_subscriptions.get(task_id, set()))
         
-        success_count = 0
-        for client_id in subscribers:
-            if await self.send_to_client(client_id, message):
-                success_count += 1
+        text = _dumps(message)
+        message_type = message.get("type")
+        results = await asyncio.gather(
+            *(self._send_text(client_id, text, message_type) for client_id in subscribers)
+        )
+        success_count = sum(results)
         
-        logger.info(f"任务消息推送: task_id={task_id}, 订阅者={len(subscribers)}, 成功={success_count}")
+        logger.info("任务消息推送: task_id=%s, 订阅者=%s, 成功=%s", task_id, len(subscribers), success_count)
+        return success_count
+    
+    async def send_to_tasks_subscribers(self, task_ids: Iterable[Optional[str]], message: dict) -> int:
+        """
+        向订阅了任一指定任务的客户端发送消息
+        
+        同一客户端订阅了多个任务时只发送一次；消息只序列化一次，并发发送给各客户端
+        
+        Args:
+            task_ids: 任务 ID 列表（空值忽略）
+            message: 消息内容（字典）
+            
+        Returns:
+            成功发送的客户端数量
+        """
+        return await self.send_text_to_tasks_subscribers(task_ids, _dumps(message), message.get("type"))
+    
+    async def send_text_to_tasks_subscribers(
+        self,
+        task_ids: Iterable[Optional[str]],
+        text: str,
+        message_type: Optional[str] = None,
+    ) -> int:
+        """
+        向订阅了任一指定任务的客户端发送已序列化的 JSON 文本
+        
+        Args:
+            task_ids: 任务 ID 列表（空值忽略）
+            text: JSON 文本
+            message_type: 消息类型（仅用于日志）
+            
+        Returns:
+            成功发送的客户端数量
+        """
+        subscribers: Set[str] = set()
+        for task_id in task_ids:
+            if task_id:
+                subscribers.update(self._task_subscriptions.get(task_id, ()))
+        
+        if not subscribers:
+            logger.debug("任务无订阅者: task_ids=%s", task_ids)
+            return 0
+        
+        results = await asyncio.gather(
+            *(self._send_text(client_id, text, message_type) for client_id in subscribers)
+        )
+        success_count = sum(results)
+        
+        logger.info("任务消息推送: task_ids=%s, 订阅者=%s, 成功=%s", task_ids, len(subscribers), success_count)
         return success_count
     
     async def broadcast(self, message: dict) -> int:
         """
         向所有连接的客户端广播消息
         
+        消息只序列化一次，并发发送给各客户端
+        
         Args:
             message: 消息内容（字典）
             
         Returns:
             成功发送的客户端数量
         """
-        # 复制连接列表，避免迭代时修改
+        # 复制连接列表，避免发送过程中断开连接时修改字典
         clients = list(self._active_connections.keys())
         
-        success_count = 0
-        for client_id in clients:
-            if await self.send_to_client(client_id, message):
-                success_count += 1
+        text = _dumps(message)
+        message_type = message.get("type")
+        results = await asyncio.gather(
+            *(self._send_text(client_id, text, message_type) for client_id in clients)
+        )
+        success_count = sum(results)
         
-        logger.info(f"广播消息: 客户端总数={len(clients)}, 成功={success_count}")
+        logger.info("广播消息: 客户端总数=%s, 成功=%s", len(clients), success_count)
         return success_count
     
     def is_connected(self, client_id: str) -> bool:
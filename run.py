@@ -6,6 +6,13 @@
 import uvicorn
 from app.config import get_settings
 
+try:
+    # uvicorn[standard] 自带 uvloop（Windows 除外），WebSocket 推送和定时回放的开销更低
+    import uvloop  # noqa: F401
+    EVENT_LOOP = "uvloop"
+except ImportError:
+    EVENT_LOOP = "asyncio"
+
 
 def main():
     """启动服务"""
@@ -17,6 +24,10 @@ def main():
         port=settings.port,
         reload=settings.debug,
         log_level=settings.log_level.lower(),
+        loop=EVENT_LOOP,
+        # WebSocket 连接存活检测由协议层 ping/pong 完成，应用层无需心跳计时器
+        ws_ping_interval=30.0,
+        ws_ping_timeout=10.0,
     )
 
 